@@ -1,9 +1,8 @@
 # --- 1. IMPORTACAO DE BIBLIOTECAS E CONFIGURACOES INICIAIS ---
-import pandas as pd
-import py_dss_interface
+# pandas, tqdm e o OpenDSS sao importados apenas dentro de simular(), para que este
+# modulo possa ser importado sem iniciar o simulador.
+import argparse
 import numpy as np
-import networkx as nx
-from tqdm import tqdm
 import os
 import pathlib
 import funcoes as fc # Importa o modulo local com as funcoes auxiliares
@@ -12,41 +11,12 @@ import funcoes as fc # Importa o modulo local com as funcoes auxiliares
 # Isso garante que o codigo funcione em qualquer computador.
 script_path = os.path.dirname(os.path.abspath(__file__))
 dss_file = pathlib.Path(script_path).joinpath("34Bus", "Run_IEEE34Mod1.dss")
+arquivo_saida = pathlib.Path(script_path).joinpath("result", "automacao_falta.csv")
 
-# Inicializa a interface com o OpenDSS e compila o arquivo mestre do circuito.
-# Esta etapa carrega o modelo da rede na memoria do simulador.
-dss = py_dss_interface.DSS()
-dss.text('Clear')
-dss.text(f'Compile {dss_file}')
-dss.solution.solve()
-
-# --- 2. PRE-PROCESSAMENTO DOS DADOS DO CIRCUITO ---
-
-# Carrega um dicionario com os caminhos dos 8 circuitos principais do alimentador.
-# Cada caminho e uma lista de nomes de linhas.
-alimentador = fc.dict_circuitos_func()
-
-# Cria um grafo (usando NetworkX) que representa a topologia da rede.
-# Isso e util para analises de conectividade e para identificar os ramais.
-G = fc.create_network_graph()
-
-# Gera uma lista de "sensores", que sao definidos como as primeiras linhas
-# de cada ramal principal do alimentador.
-lista_sensores = fc.lista_sensores_fc(G)
-
-# Executa um pre-processamento completo do circuito, extraindo dados de todas as
-# linhas (comprimento, fases, linecode, matriz de impedancia, etc.) e armazenando
-# em um dicionario para acesso rapido durante a simulacao.
-data = fc.processamento(dss)
-
-# --- 3. DEFINICAO DOS PARAMETROS DA SIMULACAO ---
+# --- 2. DEFINICAO DOS PARAMETROS PADRAO DA SIMULACAO ---
 # Define o passo de varredura da falta ao longo do comprimento de uma linha (10% em 10%).
 passo = 0.10
 
-# Cria o dicionario que ira armazenar todos os resultados da simulacao.
-# As chaves sao os nomes das medicoes e os valores sao listas vazias.
-measurement = fc.measurement_dict_fc()
-
 # Define os tipos de falta a serem simulados.
 falta_map = ['at', 'bt', 'ct', 'ab', 'bc', 'ac',
              'abt', 'bct', 'act', 'abc']
@@ -60,110 +30,145 @@ fault_r = {
     'r_40': 40.0,
 }
 
-# --- 4. LACO PRINCIPAL DE SIMULACAO DE FALTAS ---
 
-# Laco externo: itera sobre cada valor de resistencia de falta.
-cont_tqdm = ((1.0 / passo) - 1) * len(falta_map) * len(fault_r) *  sum(len(linhas) for linhas in alimentador.values())
-with tqdm(total=cont_tqdm, desc="Simulando casos de falta") as pbar:
-    for fault_r_chave in fault_r.keys():
+def simular(passo=passo, falta_map=falta_map, fault_r=fault_r, registrar_todas_linhas=False, saida=arquivo_saida):
+    """
+        Gera o dataset de faltas: varre todas as linhas de cada circuito do alimentador,
+        aplicando cada tipo de falta e cada resistencia, e registra as medicoes.
+
+        Parametros:
+            passo (float): Passo de varredura da falta ao longo de cada linha. Deve dividir 1 em
+                           partes iguais (ex: 0.10, 0.05); caso contrario, gera ValueError.
+            falta_map (list): Tipos de falta a simular (ex: 'at', 'bct').
+            fault_r (dict): Resistencias de falta {rotulo: ohms}.
+            registrar_todas_linhas (bool): Registra as correntes de TODAS as linhas do grafo, e nao
+                                           apenas as dos sensores padrao. Necessario para o otimizador
+                                           posicionamento_sensores.py.
+            saida (pathlib.Path): Arquivo CSV de saida, ou None para nao salvar.
+
+        Retorna:
+            pd.DataFrame: O dataset de faltas, sem registros duplicados.
+    """
+
+    import pandas as pd
+    from tqdm import tqdm
+
+    # O passo deve dividir a linha em trechos iguais (ex: 0.10, 0.05, 0.25); 0.3, por exemplo, nao.
+    n_trechos = round(1 / passo) if 0 < passo < 1 else 0
+    if n_trechos < 2 or abs(n_trechos * passo - 1) > 1e-9:
+        raise ValueError(f"O passo de varredura deve dividir 1 em partes iguais (recebido: {passo}).")
+
+    # Inicializa a interface com o OpenDSS e compila o arquivo mestre do circuito.
+    # Esta etapa carrega o modelo da rede na memoria do simulador.
+    dss = fc.iniciar_dss(dss_file)
+
+    # --- 3. PRE-PROCESSAMENTO DOS DADOS DO CIRCUITO ---
+
+    # Carrega um dicionario com os caminhos dos 8 circuitos principais do alimentador.
+    # Cada caminho e uma lista de nomes de linhas.
+    alimentador = fc.dict_circuitos_func()
+
+    # Cria um grafo (usando NetworkX) que representa a topologia da rede.
+    # Isso e util para analises de conectividade e para identificar os ramais.
+    G = fc.create_network_graph()
+
+    # Gera uma lista de "sensores", que sao definidos como as primeiras linhas
+    # de cada ramal principal do alimentador.
+    lista_sensores = fc.lista_sensores_fc(G)
+
+    # Executa um pre-processamento completo do circuito, extraindo dados de todas as
+    # linhas (comprimento, fases, linecode, matriz de impedancia, etc.) e armazenando
+    # em um dicionario para acesso rapido durante a simulacao.
+    data = fc.processamento(dss)
+
+    if registrar_todas_linhas:
+        linhas_registradas = fc.linhas_candidatas_fc(G, data)
+    else:
+        linhas_registradas = lista_sensores
 
-        # Laco do circuito: itera sobre cada um dos 8 caminhos principais do alimentador.
-        for circuito in alimentador.keys():
+    # Cria o dicionario que ira armazenar todos os resultados da simulacao.
+    # As chaves sao os nomes das medicoes e os valores sao listas vazias.
+    measurement = fc.measurement_dict_fc(linhas_registradas)
 
-            distancia_falta = 0
+    # --- 4. LACO PRINCIPAL DE SIMULACAO DE FALTAS ---
 
-            # Laco que varre todas as secoes de linhas de cada circuito do alimentador
-            for linha in alimentador[circuito]:
+    # Laco externo: itera sobre cada valor de resistencia de falta.
+    cont_tqdm = (n_trechos - 1) * len(falta_map) * len(fault_r) *  sum(len(linhas) for linhas in alimentador.values())
+    with tqdm(total=cont_tqdm, desc="Simulando casos de falta") as pbar:
+        for fault_r_chave in fault_r.keys():
 
-                # Gera uma lista de pontos percentuais ao longo da linha para aplicar a falta.
-                porcentagem_linha = np.arange(passo, 1, passo).tolist()
+            # Laco do circuito: itera sobre cada um dos 8 caminhos principais do alimentador.
+            for circuito in alimentador.keys():
 
-                # Laco da localizacao: itera sobre cada ponto percentual na linha.
-                for porcentagem_distancia in porcentagem_linha:
+                # Distancia da subestacao ate o inicio da linha atual.
+                inicio_linha = 0
 
-                    # Atualiza a distancia acumulada da falta a partir da subestacao.
-                    distancia_falta = distancia_falta + passo * data[linha]['length']
+                # Laco que varre todas as secoes de linhas de cada circuito do alimentador
+                for linha in alimentador[circuito]:
 
-                    # Laco do tipo de falta: itera sobre todos os tipos de falta definidos.
-                    for tipo_falta in falta_map:
-                        pbar.update(1)
+                    # Gera uma lista de pontos percentuais ao longo da linha para aplicar a falta.
+                    # Os pontos vem do numero inteiro de trechos, para que nenhum caia em 1.0.
+                    porcentagem_linha = (np.arange(1, n_trechos) / n_trechos).tolist()
 
-                        dss.text('Clear')
-                        dss.text(f'Compile {dss_file}')
+                    # Laco da localizacao: itera sobre cada ponto percentual na linha.
+                    for porcentagem_distancia in porcentagem_linha:
 
-                        # Chama uma funcao para verificar se o tipo de falta e aplicavel às fases desta linha.
-                        # Se nao for, pula para a proxima iteracao com 'continue'.
-                        if fc.parametro_de_falta(tipo_falta, data[linha]['phases']) is None:
-                            continue
+                        # Distancia da falta a partir da subestacao.
+                        distancia_falta = inicio_linha + porcentagem_distancia * data[linha]['length']
 
-                        # Se a falta for aplicavel, obtem os parametros necessarios para o OpenDSS.
-                        fault_bus1, fault_bus2, n_phases = fc.parametro_de_falta(tipo_falta, data[linha]['phases'])
+                        # Laco do tipo de falta: itera sobre todos os tipos de falta definidos.
+                        for tipo_falta in falta_map:
+                            pbar.update(1)
 
-                        # Define a string de nos do barramento (ex: '.1.2.3')
-                        bus_nodes = '.' + '.'.join(data[linha]['phases'][::-1])
+                            dss.text('Clear')
+                            dss.text(f'Compile {dss_file}')
 
-                        # --- MODIFICACAO DINAMICA DO CIRCUITO PARA INSERIR A FALTA ---
-                        # 1. Edita a linha original, encurtando seu comprimento e conectando-a a uma nova "barra de falta".
-                        dss.text(f'Edit Line.{linha} Length={data[linha]["length"] * porcentagem_distancia}')
-                        dss.text(f'Edit Line.{linha} bus2=barra_falta{bus_nodes}')
+                            # Aplica a falta e resolve o circuito. Se o tipo de falta nao for aplicavel
+                            # às fases desta linha, pula para a proxima iteracao com 'continue'.
+                            parametros_falta = fc.aplicar_falta(dss, data, linha, porcentagem_distancia,
+                                                                tipo_falta, fault_r[fault_r_chave])
+                            if parametros_falta is None:
+                                continue
+                            fault_bus1, fault_bus2 = parametros_falta
 
-                        # 2. Cria uma linha auxiliar para representar o trecho restante da linha original.
-                        dss.text(f'New Line.Auxiliar Phases={data[linha]["num_phases"]}')
-                        dss.text(f'~ Bus1=barra_falta{bus_nodes}')
-                        dss.text(f'~ Bus2={data[linha]["bus2"]}{bus_nodes}')
-                        dss.text(f'~ Linecode={data[linha]["linecode"]}')
-                        dss.text(f'~ Length={(1 - porcentagem_distancia) * data[linha]["length"]}')
-                        dss.text(f'~ units=kft')
+                            # --- ARMAZENAMENTO DOS DADOS ---
+                            # Coleta as medicoes na subestacao (Linha L1) e nos sensores.
+                            for medida, valor in fc.coletar_medicoes(dss, data, linhas_registradas).items():
+                                measurement[medida].append(valor)
 
-                        # 3. Cria o objeto 'Fault' na "barra de falta", aplicando o curto-circuito.
-                        dss.text('New Fault.Falta')
-                        dss.text(f'~ phases={n_phases}')
-                        dss.text(f'~ bus1=barra_falta{fault_bus1}')
+                            # Armazena os metadados da falta
+                            measurement['linha_faltosa'].append(linha)
+                            measurement['distancia'].append(distancia_falta * 304.8)
+                            measurement['tipo'].append(str(fault_bus1 + fault_bus2))
+                            measurement['r_f'].append(fault_r_chave)
 
-                        # Para faltas entre fases, define o segundo terminal do objeto 'Fault'.
-                        if set([tipo_falta]).issubset({'ab', 'bc', 'ac'}):
-                            dss.text(f'~ bus2=barra_falta{fault_bus2}')
-                        dss.text(f'~ R={fault_r[fault_r_chave]}')
+                    # A proxima linha do circuito comeca no fim desta.
+                    inicio_linha = inicio_linha + data[linha]['length']
 
-                        # 4. Resolve o fluxo de potencia para o cenario com falta.
-                        dss.solution.solve()
+    # --- 5. PÓS-PROCESSAMENTO E EXPORTACAO DOS DADOS ---
+    resultado_df = pd.DataFrame(measurement)
 
-                        # --- ARMAZENAMENTO DOS DADOS ---
-                        # Coleta as medicoes na saida da subestacao (Linha L1).
-                        dss.circuit.set_active_element('Line.L1')
+    resultado_df_sem_duplicada = resultado_df.drop_duplicates()
 
-                        # Coleta e armazena as tensoes (parte real e imaginaria).
-                        for indice, medida in enumerate(['va_r', 'va_i', 'vb_r', 'vb_i', 'vc_r', 'vc_i']):
-                            measurement[medida].append(dss.cktelement.voltages[indice])
+    # Salva o DataFrame final em um arquivo CSV.
+    if saida is not None:
+        resultado_df_sem_duplicada.to_csv(saida, sep=';', decimal=",", index=False)
 
-                        # Coleta e armazena as correntes (parte real e imaginaria).
-                        for indice, medida in enumerate(['ia_r', 'ia_i', 'ib_r', 'ib_i', 'ic_r', 'ic_i']):
-                            measurement[medida].append(dss.cktelement.currents[indice])
+    return resultado_df_sem_duplicada
 
-                        # Armazena os metadados da falta
-                        measurement['linha_faltosa'].append(linha)
-                        measurement['distancia'].append(distancia_falta * 304.8)
-                        measurement['tipo'].append(str(fault_bus1 + fault_bus2))
-                        measurement['r_f'].append(fault_r_chave)
 
-                        # Coleta os dados de magnitude de corrente dos sensores.
-                        for linha_sensor in lista_sensores:
-                            dss.circuit.set_active_element(f'line.{linha_sensor}')
-                            for indice, medida in enumerate(['ia', 'ib', 'ic']):
-                                measurement[f'{linha_sensor}_{medida}'].append(fc.format_abs_sensor(dss.cktelement.currents,
-                                                                                                    data[linha_sensor][
-                                                                                                        'phases'][::-1])[indice])
-                    # Atualiza a distancia acumulada com o ultimo trecho da linha.
-                    if porcentagem_distancia == 1 - passo:
-                        distancia_falta = distancia_falta + passo * data[linha]['length']
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Gera o dataset de faltas simuladas no OpenDSS.")
+    parser.add_argument('--passo', type=float, default=passo,
+                        help="Passo de varredura da falta ao longo de cada linha; deve dividir 1 em partes iguais (padrao: 0.10).")
+    parser.add_argument('--todas-linhas', action='store_true',
+                        help="Registra as correntes de todas as linhas (necessario para o otimizador de sensores).")
+    args = parser.parse_args(argv)
 
-# --- 5. PÓS-PROCESSAMENTO E EXPORTACAO DOS DADOS ---
-resultado_df = pd.DataFrame(measurement)
+    simular(passo=args.passo, registrar_todas_linhas=args.todas_linhas)
 
-resultado_df_sem_duplicada = resultado_df.drop_duplicates()
+    print("\nSimulacao concluida e resultados salvos com sucesso!")
 
-# Salva o DataFrame final em um arquivo CSV.
-resultado_df_sem_duplicada.to_csv(pathlib.Path(script_path).joinpath("result", "automacao_falta.csv"), sep=';', decimal=",",
-                                  index=False)
 
-print("\nSimulacao concluida e resultados salvos com sucesso!")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
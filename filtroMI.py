@@ -1,97 +1,121 @@
 # --- 1. IMPORTACÕES E CONFIGURACÃO INICIAL ---
-import py_dss_interface
-import pandas as pd
-import networkx as nx
-from tqdm import tqdm
+# pandas e tqdm sao importados apenas dentro de filtrar(). O OpenDSS nao e necessario:
+# os comprimentos das linhas sao lidos diretamente dos arquivos do modelo.
+import argparse
 import os
 import pathlib
 import funcoes as fc # Importa o módulo local com as funcoes auxiliares
 
-# --- 2. PRÉ-PROCESSAMENTO E CARGA DE DADOS ---
-
 # Define os caminhos de forma robusta, baseando-se na localizacao do script.
 script_path = os.path.dirname(os.path.abspath(__file__))
-
-# O script precisa de alguns dados estaticos do circuito (como comprimentos de linha)
-# que sao obtidos ao carregar o modelo no OpenDSS.
 dss_file = pathlib.Path(script_path).joinpath("34Bus", "Run_IEEE34Mod1.dss")
-dss = py_dss_interface.DSS()
-dss.text('Clear')
-dss.text(f'Compile {dss_file}')
-dss.solution.solve()
+arquivo_entrada = pathlib.Path(script_path).joinpath("result", "minima_reatancia.csv")
+arquivo_saida = pathlib.Path(script_path).joinpath("result", "filtragem_MI.csv")
+
+
+def filtrar(entrada=arquivo_entrada, saida=arquivo_saida):
+    """
+        Seleciona, entre as multiplas estimativas da Minima Reatancia, a do circuito cujo
+        sensor responsavel registrou a maior corrente.
+
+        Parametros:
+            entrada (pathlib.Path): Estimativas (formato de minima_reatancia.csv).
+            saida (pathlib.Path): Arquivo CSV de saida, ou None para nao salvar.
+
+        Retorna:
+            pd.DataFrame: A estimativa escolhida, os dados reais da falta e o erro percentual.
+    """
+
+    import pandas as pd
+    from tqdm import tqdm
+
+    # --- 2. PRÉ-PROCESSAMENTO E CARGA DE DADOS ---
+
+    # O script precisa apenas dos comprimentos das linhas, lidos do arquivo do modelo.
+    comprimentos = fc.comprimentos_linhas(dss_file)
+
+    # Cria um grafo da rede para ser usado pelas funcoes auxiliares.
+    G = fc.create_network_graph()
+
+    # Obtem o "ramal principal" do alimentador, definido de forma manual em funcoes.py
+    ramal_principal = fc.ramal_principal_func()
+
+    # Calcula o comprimento total do ramal principal em metros.
+    # Este valor sera usado como base para o calculo do erro percentual da localizacao.
+    length_ramal = sum(comprimentos[sec_linha]*304.8 for sec_linha in ramal_principal)
+
+    # Carrega o arquivo com as multiplas estimativas geradas pelo script 'minima_reatancia.py'.
+    resultado = pd.read_csv(entrada, sep=';', decimal=',')
+
+    # Inicializa as listas que irao armazenar os resultados filtrados.
+    linha_identificada = []
+    distancia_identificada = []
 
-# Pre-processa os dados de todas as linhas para obter seus parametros.
-data = fc.processamento(dss)
+    # --- 3. LOGICA DE FILTRAGEM DAS ESTIMATIVAS ---
 
-# Cria um grafo da rede para ser usado pelas funcoes auxiliares.
-G = fc.create_network_graph()
+    # Itera sobre cada linha do DataFrame, onde cada linha e um caso de falta
+    # com 8 possiveis localizacoes estimadas (ckt1_d, ckt2_d, etc.).
+    for index, row in tqdm(resultado.iterrows(), total=resultado.shape[0], desc="Analisando Casos de Falta"):
 
-# Define o "ramal principal" do alimentador de forma manual
-ramal_principal =['l1', 'l2', 'l3', 'l5', 'l6', 'l24', 'l9', 'l13', 'l14', 'l15', 'l27', 'l16', 'l29', 'l17',
-             'l30', 'l20']
+        # Determina qual fase da corrente do sensor deve ser analisada com base no tipo de falta.
+        # Ex: Para uma falta na fase 'A' (tipo '.1.0'), devemos olhar a corrente 'ia'.
+        if row['tipo_de_falta'] in {'.1.0', '.1.2', '.1.2.0', '.3.1', '.3.1.0', '.1.3', '.1.3.0', '.1.2.3.0'}:
+            prefixo = '_ia'
+        elif row['tipo_de_falta'] in {'.2.0', '.2.3', '.2.3.0'}:
+            prefixo = '_ib'
+        elif row['tipo_de_falta'] in {'.3.0'}:
+            prefixo = '_ic'
 
-# Calcula o comprimento total do ramal principal em metros.
-# Este valor sera usado como base para o calculo do erro percentual da localizacao.
-length_ramal = sum(data[sec_linha]['length']*304.8 for sec_linha in ramal_principal)
+        lista_leitura_sensores = []
 
-# Carrega o arquivo com as multiplas estimativas geradas pelo script 'minima_reatancia.py'.
-resultado = pd.read_csv(pathlib.Path(script_path).joinpath("result", "minima_reatancia.csv"), sep=';', decimal=',')
+        # Para cada uma das 8 estimativas de circuito (de ckt1 a ckt8)...
+        for i in range(8):
+            # 1. Determina qual sensor e responsavel por monitorar essa linha.
+            _, sensor_responsavel = fc.get_sensor_locations(G, '800', row[f'ckt{i+1}_line'])
 
-# Inicializa as listas que irao armazenar os resultados filtrados.
-linha_identificada = []
-distancia_identificada = []
+            # 3. Busca no DataFrame o valor da corrente medida por aquele sensor na fase de interesse.
+            # Ex: Busca o valor da coluna 'l9_ia' e o adiciona à lista.
+            lista_leitura_sensores.append(row[f'{sensor_responsavel}{prefixo}'])
 
-# --- 3. LOGICA DE FILTRAGEM DAS ESTIMATIVAS ---
+        # O PRINCÍPIO DA FILTRAGEM: O caminho correto da falta e aquele cujo sensor
+        # de monitoramento registrou a maior corrente.
+        # Encontra o indice da maior leitura de corrente. Este indice corresponde ao circuito correto.
+        indice = lista_leitura_sensores.index(max(lista_leitura_sensores)) + 1
 
-# Itera sobre cada linha do DataFrame, onde cada linha e um caso de falta
-# com 8 possiveis localizacoes estimadas (ckt1_d, ckt2_d, etc.).
-for index, row in tqdm(resultado.iterrows(), total=resultado.shape[0], desc="Analisando Casos de Falta"):
+        # Usa o indice encontrado para selecionar a linha e a distancia corretas.
+        linha_identificada.append(row[f'ckt{indice}_line'])
+        distancia_identificada.append(row[f'ckt{indice}_d'])
 
-    # Determina qual fase da corrente do sensor deve ser analisada com base no tipo de falta.
-    # Ex: Para uma falta na fase 'A' (tipo '.1.0'), devemos olhar a corrente 'ia'.
-    if row['tipo_de_falta'] in {'.1.0', '.1.2', '.1.2.0', '.3.1', '.3.1.0', '.1.2.3.0'}:
-        prefixo = '_ia'
-    elif row['tipo_de_falta'] in {'.2.0', '.2.3', '.2.3.0'}:
-        prefixo = '_ib'
-    elif row['tipo_de_falta'] in {'.3.0'}:
-        prefixo = '_ic'
+    # --- 4. POS-PROCESSAMENTO E EXPORTACÃO DOS RESULTADOS ---
 
-    lista_leitura_sensores = []
+    # Cria um dicionario com os resultados finais e ja filtrados.
+    resultado_multipla = {'linha_identificada': linha_identificada,
+                          'distancia_identificada': distancia_identificada}
 
-    # Para cada uma das 8 estimativas de circuito (de ckt1 a ckt8)...
-    for i in range(8):
-        # 1. Determina qual sensor e responsavel por monitorar essa linha.
-        _, sensor_responsavel = fc.get_sensor_locations(G, '800', row[f'ckt{i+1}_line'])
+    # Converte o dicionario para um DataFrame do Pandas.
+    df_resultado = pd.DataFrame(resultado_multipla)
 
-        # 3. Busca no DataFrame o valor da corrente medida por aquele sensor na fase de interesse.
-        # Ex: Busca o valor da coluna 'l9_ia' e o adiciona à lista.
-        lista_leitura_sensores.append(row[f'{sensor_responsavel}{prefixo}'])
+    # Junta os resultados filtrados com os dados originais da falta para comparacao.
+    df_resultado = df_resultado.join(resultado[['linha_faltosa', 'distancia real', 'tipo_de_falta', 'r_f']])
 
-    # O PRINCÍPIO DA FILTRAGEM: O caminho correto da falta e aquele cujo sensor
-    # de monitoramento registrou a maior corrente.
-    # Encontra o indice da maior leitura de corrente. Este indice corresponde ao circuito correto.
-    indice = lista_leitura_sensores.index(max(lista_leitura_sensores)) + 1
+    # Calcula o erro percentual da estimativa em relacao ao comprimento total do ramal principal.
+    df_resultado['erro'] = 100 * ((df_resultado['distancia_identificada'] - df_resultado['distancia real']) / length_ramal)
 
-    # Usa o indice encontrado para selecionar a linha e a distancia corretas.
-    linha_identificada.append(row[f'ckt{indice}_line'])
-    distancia_identificada.append(row[f'ckt{indice}_d'])
+    # Salva o DataFrame final com os resultados filtrados em um novo arquivo CSV.
+    if saida is not None:
+        df_resultado.to_csv(saida, sep=';', decimal=',')
 
-# --- 4. POS-PROCESSAMENTO E EXPORTACÃO DOS RESULTADOS ---
+    return df_resultado
 
-# Cria um dicionario com os resultados finais e ja filtrados.
-resultado_multipla = {'linha_identificada': linha_identificada,
-                      'distancia_identificada': distancia_identificada}
 
-# Converte o dicionario para um DataFrame do Pandas.
-df_resultado = pd.DataFrame(resultado_multipla)
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Filtra as estimativas da Minima Reatancia com os medidores inteligentes.")
+    parser.parse_args(argv)
 
-# Junta os resultados filtrados com os dados originais da falta para comparacao.
-df_resultado = df_resultado.join(resultado[['linha_faltosa', 'distancia real', 'tipo_de_falta', 'r_f']])
+    filtrar()
 
-# Calcula o erro percentual da estimativa em relacao ao comprimento total do ramal principal.
-df_resultado['erro'] = 100 * ((df_resultado['distancia_identificada'] - df_resultado['distancia real']) / length_ramal)
+    print('Analise de filtragem concluida com sucesso!')
 
-# Salva o DataFrame final com os resultados filtrados em um novo arquivo CSV.
-df_resultado.to_csv(pathlib.Path(script_path).joinpath("result", "filtragem_MI.csv"), sep=';', decimal=',')
 
-print('Analise de filtragem concluida com sucesso!')
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
-import py_dss_interface
-import networkx as nx
+# py_dss_interface e networkx sao importados apenas nas funcoes que os utilizam, para que
+# este modulo possa ser importado rapidamente, sem carregar o OpenDSS.
 import numpy as np
+import pathlib
 
 def dict_circuitos_func():
     """
@@ -37,6 +38,77 @@ def dict_circuitos_func():
                       'circuito8': circuito8} 
 
     return dict_circuitos
+
+
+def ramal_principal_func():
+    """
+        Retorna a lista de linhas do ramal principal do alimentador IEEE 34 Barras.
+
+        O comprimento total deste ramal e usado como base para o calculo do erro percentual
+        da localizacao. Assim como dict_circuitos_func, os valores sao definidos manualmente.
+
+        Retorna:
+            list: Lista de strings com os nomes das linhas do ramal principal.
+    """
+
+    return ['l1', 'l2', 'l3', 'l5', 'l6', 'l24', 'l9', 'l13', 'l14', 'l15', 'l27', 'l16', 'l29', 'l17',
+            'l30', 'l20']
+
+
+def comprimentos_linhas(dss_file):
+    """
+        Le os comprimentos das linhas diretamente dos arquivos de texto do modelo OpenDSS,
+        sem iniciar o simulador.
+
+        Os comandos 'Compile' e 'Redirect' sao seguidos recursivamente. Apenas valores
+        numericos simples de 'Length' sao suportados, como os do modelo IEEE34Mod1.
+
+        Parametros:
+            dss_file (str ou pathlib.Path): Arquivo mestre do modelo (ex: Run_IEEE34Mod1.dss).
+
+        Retorna:
+            dict: Dicionario {nome da linha em minusculas: comprimento}, na mesma unidade
+                  informada no modelo (a mesma retornada por dss.lines.length).
+    """
+
+    comprimentos = {}
+    elemento = None
+
+    pasta = pathlib.Path(dss_file).parent
+    # O OpenDSS e usado no Windows, onde nomes de arquivo nao diferenciam maiusculas.
+    arquivos = {p.name.lower(): p for p in pasta.iterdir()}
+
+    with open(dss_file, encoding='utf-8', errors='ignore') as f:
+        linhas_arquivo = f.readlines()
+
+    for texto in linhas_arquivo:
+        texto = texto.split('!')[0].strip()
+        if not texto:
+            continue
+
+        partes = texto.split()
+        comando = partes[0].lower()
+
+        if comando in {'compile', 'redirect'} and len(partes) > 1:
+            comprimentos.update(comprimentos_linhas(arquivos[partes[1].lower()]))
+            continue
+
+        if comando == 'new':
+            nome = partes[1].lower()
+            elemento = nome[len('line.'):] if nome.startswith('line.') else None
+        elif comando != '~':
+            elemento = None
+
+        if elemento is None:
+            continue
+
+        for parametro in partes[1:]:
+            if '=' in parametro:
+                chave, valor = parametro.split('=', 1)
+                if chave.lower() == 'length':
+                    comprimentos[elemento] = float(valor)
+
+    return comprimentos
     
 def create_network_graph():
  
@@ -50,6 +122,8 @@ def create_network_graph():
         nx.DiGraph: Um objeto de grafo do NetworkX representando a rede.
     """
 
+    import networkx as nx
+
     g = nx.DiGraph()
     arestas = [
         ('800', '802', 'l1'), ('802', '806', 'l2'), ('806', '808', 'l3'),
@@ -144,13 +218,32 @@ def lista_sensores_fc(g):
 
     return lista_sensores
 
-def measurement_dict_fc():
+def linhas_candidatas_fc(g, data):
+    """
+        Retorna todas as linhas do grafo que existem no modelo OpenDSS, ou seja, todos os
+        locais candidatos para a instalacao de um sensor (os reguladores sao excluidos).
+
+        Parametros:
+            G (nx.DiGraph): O grafo da rede.
+            data (dict): Dicionario de parametros das linhas retornado por processamento.
+
+        Retorna:
+            list: Uma lista de strings com os nomes (labels) das linhas candidatas.
+    """
+
+    return [data_aresta['label'] for _, _, data_aresta in g.edges(data=True) if data_aresta['label'] in data]
+
+def measurement_dict_fc(lista_sensores=None):
     """
         Cria e retorna um dicionario modelo (template) para armazenar os resultados da simulacao.
 
         As chaves sao pre-definidas para armazenar tensoes, correntes, dados da falta e
         medicoes dos sensores. Cada valor e uma lista vazia, pronta para ser preenchida.
 
+        Parametros:
+            lista_sensores (list): Linhas cujas correntes serao registradas. Se omitida,
+                                   usa os sensores padrao de lista_sensores_fc.
+
         """
 
     measurement_dict = {}
@@ -163,9 +256,9 @@ def measurement_dict_fc():
     for i in ['linha_faltosa', 'distancia', 'tipo', 'r_f']:
         measurement_dict[i] = []
       
-    g = create_network_graph()
-    
-    lista_sensores = lista_sensores_fc(g)
+    if lista_sensores is None:
+        g = create_network_graph()
+        lista_sensores = lista_sensores_fc(g)
 
     for sensor in lista_sensores:
         for fase in ['a', 'b', 'c']:
@@ -174,6 +267,54 @@ def measurement_dict_fc():
     return measurement_dict
 
 
+def iniciar_dss(dss_file):
+    """
+        Inicializa a interface com o OpenDSS, compila o arquivo mestre do circuito e resolve
+        o caso base. A importacao do py_dss_interface e feita apenas aqui.
+
+        Parametros:
+            dss_file (str ou pathlib.Path): Arquivo mestre do modelo (ex: Run_IEEE34Mod1.dss).
+
+        Retorna:
+            py_dss_interface.DSS: A instancia do objeto DSS com o circuito base resolvido.
+    """
+
+    import py_dss_interface
+
+    dss = py_dss_interface.DSS()
+    dss.text('Clear')
+    dss.text(f'Compile {dss_file}')
+    dss.solution.solve()
+
+    return dss
+
+
+def pre_falta(dss):
+    """
+        Captura os valores de tensao e corrente na subestacao (Line.L1) no caso base,
+        ANTES da falta, como vetores complexos 1D do NumPy.
+
+        Parametros:
+            dss (py_dss_interface.DSS): A instancia do objeto DSS com o caso base resolvido.
+
+        Retorna:
+            tuple: (Vpre, Ipre), vetores complexos com as tres fases.
+    """
+
+    dss.circuit.set_active_element('Line.L1')
+    V_pre_falta = dss.cktelement.voltages
+    I_pre_falta = dss.cktelement.currents
+
+    Vpre = np.array([V_pre_falta[0] + 1j * V_pre_falta[1],
+                     V_pre_falta[2] + 1j * V_pre_falta[3],
+                     V_pre_falta[4] + 1j * V_pre_falta[5]])
+    Ipre = np.array([I_pre_falta[0] + 1j * I_pre_falta[1],
+                     I_pre_falta[2] + 1j * I_pre_falta[3],
+                     I_pre_falta[4] + 1j * I_pre_falta[5]])
+
+    return Vpre, Ipre
+
+
 def processamento(dss):
     """
         Realiza um pre-processamento de todos os elementos 'Line' do circuito OpenDSS,
@@ -312,6 +453,97 @@ def format_abs_sensor(list_measurement, phases):
     
     return sensor_abs
     
+def aplicar_falta(dss, data, linha, porcentagem_distancia, tipo_falta, r_falta):
+    """
+        Insere uma falta no circuito ja compilado e resolve o fluxo de potencia.
+
+        A linha original e encurtada ate a "barra de falta", uma linha auxiliar representa o
+        trecho restante e um objeto 'Fault' e conectado na barra de falta.
+
+        Parametros:
+            dss (py_dss_interface.DSS): A instancia do objeto DSS, com o circuito base compilado.
+            data (dict): Dicionario de parametros das linhas retornado por processamento.
+            linha (str): Nome da linha onde a falta e aplicada.
+            porcentagem_distancia (float): Posicao da falta como fracao do comprimento da linha.
+            tipo_falta (str): A chave que identifica o tipo de falta (ex: "at", "bct").
+            r_falta (float): Resistencia de falta em ohms.
+
+        Retorna:
+            tuple: (bus1, bus2) da falta, ou None se a falta nao for aplicavel às fases da linha.
+    """
+
+    # Verifica se o tipo de falta e aplicavel às fases desta linha.
+    parametros = parametro_de_falta(tipo_falta, data[linha]['phases'])
+    if parametros is None:
+        return None
+
+    fault_bus1, fault_bus2, n_phases = parametros
+
+    # Define a string de nos do barramento (ex: '.1.2.3')
+    bus_nodes = '.' + '.'.join(data[linha]['phases'][::-1])
+
+    # 1. Edita a linha original, encurtando seu comprimento e conectando-a a uma nova "barra de falta".
+    dss.text(f'Edit Line.{linha} Length={data[linha]["length"] * porcentagem_distancia}')
+    dss.text(f'Edit Line.{linha} bus2=barra_falta{bus_nodes}')
+
+    # 2. Cria uma linha auxiliar para representar o trecho restante da linha original.
+    dss.text(f'New Line.Auxiliar Phases={data[linha]["num_phases"]}')
+    dss.text(f'~ Bus1=barra_falta{bus_nodes}')
+    dss.text(f'~ Bus2={data[linha]["bus2"]}{bus_nodes}')
+    dss.text(f'~ Linecode={data[linha]["linecode"]}')
+    dss.text(f'~ Length={(1 - porcentagem_distancia) * data[linha]["length"]}')
+    dss.text(f'~ units=kft')
+
+    # 3. Cria o objeto 'Fault' na "barra de falta", aplicando o curto-circuito.
+    dss.text('New Fault.Falta')
+    dss.text(f'~ phases={n_phases}')
+    dss.text(f'~ bus1=barra_falta{fault_bus1}')
+
+    # Para faltas entre fases, define o segundo terminal do objeto 'Fault'.
+    if set([tipo_falta]).issubset({'ab', 'bc', 'ac'}):
+        dss.text(f'~ bus2=barra_falta{fault_bus2}')
+    dss.text(f'~ R={r_falta}')
+
+    # 4. Resolve o fluxo de potencia para o cenario com falta.
+    dss.solution.solve()
+
+    return fault_bus1, fault_bus2
+
+
+def coletar_medicoes(dss, data, lista_sensores):
+    """
+        Coleta as medicoes do cenario resolvido: tensoes e correntes na saida da subestacao
+        (Linha L1) e magnitudes de corrente dos sensores.
+
+        Parametros:
+            dss (py_dss_interface.DSS): A instancia do objeto DSS, com o cenario ja resolvido.
+            data (dict): Dicionario de parametros das linhas retornado por processamento.
+            lista_sensores (list): Linhas onde estao instalados os sensores.
+
+        Retorna:
+            dict: Dicionario {nome da medicao: valor}, com as mesmas chaves de measurement_dict_fc.
+    """
+
+    medicoes = {}
+
+    dss.circuit.set_active_element('Line.L1')
+
+    # Tensoes e correntes (parte real e imaginaria).
+    for indice, medida in enumerate(['va_r', 'va_i', 'vb_r', 'vb_i', 'vc_r', 'vc_i']):
+        medicoes[medida] = dss.cktelement.voltages[indice]
+    for indice, medida in enumerate(['ia_r', 'ia_i', 'ib_r', 'ib_i', 'ic_r', 'ic_i']):
+        medicoes[medida] = dss.cktelement.currents[indice]
+
+    # Magnitudes de corrente dos sensores.
+    for linha_sensor in lista_sensores:
+        dss.circuit.set_active_element(f'line.{linha_sensor}')
+        correntes = format_abs_sensor(dss.cktelement.currents, data[linha_sensor]['phases'][::-1])
+        for indice, medida in enumerate(['ia', 'ib', 'ic']):
+            medicoes[f'{linha_sensor}_{medida}'] = correntes[indice]
+
+    return medicoes
+
+
 def reatancia_calc(tipo_falta, v_f, i_f):
 
     """
@@ -343,4 +575,138 @@ def reatancia_calc(tipo_falta, v_f, i_f):
     elif set([tipo_falta]).issubset({'.1.2.3.0'}):
         xf = ((v_f[1] - v_f[0])/(i_f[1] - i_f[0])).imag
         
-    return xf
\ No newline at end of file
+    return xf
+
+def tabelas_minima_reatancia(alimentador, data, v_pre, i_pre, passo=0.01):
+    """
+        Pre-calcula, para todos os circuitos do alimentador, as grandezas do metodo da
+        Minima Reatancia que nao dependem das medicoes de falta.
+
+        Para cada passo de varredura (1% do comprimento de cada linha) sao armazenados a
+        impedancia a montante, a admitancia equivalente a jusante (inversa de z_jusante),
+        a distancia acumulada e o indice da linha analisada. Os passos de todos os
+        circuitos sao concatenados e 'inicio' delimita o trecho de cada circuito.
+
+        Parametros:
+            alimentador (dict): Dicionario de circuitos retornado por dict_circuitos_func.
+            data (dict): Dicionario de parametros das linhas retornado por processamento.
+            v_pre (np.ndarray): Vetor complexo das tensoes de pre-falta na subestacao.
+            i_pre (np.ndarray): Vetor complexo das correntes de pre-falta na subestacao.
+            passo (float): Fracao do comprimento da linha avancada a cada passo.
+
+        Retorna:
+            tuple: (tabelas, linhas), onde 'tabelas' e um dicionario de arrays do NumPy
+                   ('z_montante', 'yeq', 'distancia', 'linha', 'inicio') e 'linhas' e a
+                   lista de nomes das linhas referenciadas pelo array 'linha'.
+    """
+
+    linhas = []
+    z_montante_lista = []
+    yeq_lista = []
+    distancia_lista = []
+    linha_lista = []
+    inicio = [0]
+
+    n_passos = int(round(1 / passo))
+
+    for circuito in alimentador.keys():
+
+        # Impedancia total do circuito (mesma soma feita em minima_reatancia.py).
+        z_ckt = np.array([[0, 0, 0], [0, 0, 0], [0, 0, 0]])
+        for linha in alimentador[circuito]:
+            z_ckt = z_ckt + data[linha]['zmatrix'] * float(data[linha]['length'])
+
+        # Impedancia de carga equivalente vista da subestacao.
+        Zca = (v_pre[0] / i_pre[0] - (z_ckt[0, 0] * i_pre[0] + z_ckt[1, 0] * i_pre[1] + z_ckt[2, 0] * i_pre[2]) / i_pre[0])
+        Zcb = (v_pre[1] / i_pre[1] - (z_ckt[0, 1] * i_pre[0] + z_ckt[1, 1] * i_pre[1] + z_ckt[2, 1] * i_pre[2]) / i_pre[1])
+        Zcc = (v_pre[2] / i_pre[2] - (z_ckt[0, 2] * i_pre[0] + z_ckt[1, 2] * i_pre[1] + z_ckt[2, 2] * i_pre[2]) / i_pre[2])
+        z_total = z_ckt + np.array([[Zca, 0, 0], [0, Zcb, 0], [0, 0, Zcc]])
+
+        distancia = 0
+        z_montante = np.array([[0, 0, 0], [0, 0, 0], [0, 0, 0]])
+
+        for linha in alimentador[circuito]:
+            if linha not in linhas:
+                linhas.append(linha)
+
+            l_linha = data[linha]['length']
+            for _ in range(n_passos):
+                # Acumula do mesmo modo que o laco sequencial para manter os mesmos valores.
+                distancia += l_linha * passo
+                z_montante = z_montante + l_linha * passo * data[linha]['zmatrix']
+
+                z_montante_lista.append(z_montante)
+                yeq_lista.append(np.linalg.inv(z_total - z_montante))
+                distancia_lista.append(distancia)
+                linha_lista.append(linhas.index(linha))
+
+        inicio.append(len(distancia_lista))
+
+    tabelas = {'z_montante': np.array(z_montante_lista, dtype=complex),
+               'yeq': np.array(yeq_lista, dtype=complex),
+               'distancia': np.array(distancia_lista, dtype=float),
+               'linha': np.array(linha_lista, dtype=np.int32),
+               'inicio': np.array(inicio, dtype=np.int64)}
+
+    return tabelas, linhas
+
+
+def minima_reatancia_vetorizada(v_falta, i_falta, tipo_falta, tabelas):
+    """
+        Aplica o metodo da Minima Reatancia a um bloco de registros de um mesmo tipo de
+        falta, usando as tabelas pre-calculadas por tabelas_minima_reatancia.
+
+        Todos os passos de um circuito sao avaliados de uma vez; a falta e localizada no
+        primeiro passo em que a reatancia se torna negativa, com interpolacao linear entre
+        esse passo e o anterior. Se a reatancia nunca cruzar zero, retorna o fim do circuito.
+
+        Parametros:
+            v_falta (np.ndarray): Tensoes complexas na subestacao, formato (n, 3).
+            i_falta (np.ndarray): Correntes complexas na subestacao, formato (n, 3).
+            tipo_falta (str): String que descreve os nos da falta (ex: '.1.0').
+            tabelas (dict): Tabelas retornadas por tabelas_minima_reatancia.
+
+        Retorna:
+            tuple: (distancias, indices_linha), arrays de formato (n, numero de circuitos)
+                   com a distancia estimada (na unidade do modelo) e o indice da linha.
+    """
+
+    inicio = tabelas['inicio']
+    n_registros = v_falta.shape[0]
+    n_circuitos = len(inicio) - 1
+
+    distancias = np.empty((n_registros, n_circuitos))
+    indices_linha = np.empty((n_registros, n_circuitos), dtype=np.int32)
+    registros = np.arange(n_registros)
+
+    for c in range(n_circuitos):
+        z_montante = tabelas['z_montante'][inicio[c]:inicio[c + 1]]
+        yeq = tabelas['yeq'][inicio[c]:inicio[c + 1]]
+        distancia = tabelas['distancia'][inicio[c]:inicio[c + 1]]
+        linha = tabelas['linha'][inicio[c]:inicio[c + 1]]
+
+        # Tensao e corrente no ponto de falta para todos os passos, formato (n, passos, 3).
+        Vf = v_falta[:, None, :] - np.einsum('kij,nj->nki', z_montante, i_falta)
+        If = i_falta[:, None, :] - np.einsum('kij,nkj->nki', yeq, Vf)
+
+        # reatancia_calc indexa a fase no primeiro eixo, por isso as fases vao para a frente.
+        reatancia = np.asarray(reatancia_calc(tipo_falta, np.moveaxis(Vf, -1, 0), np.moveaxis(If, -1, 0)))
+        reatancia = np.broadcast_to(reatancia, (n_registros, len(distancia)))
+
+        negativa = reatancia < 0
+        encontrada = negativa.any(axis=1)
+        k = np.where(encontrada, negativa.argmax(axis=1), len(distancia) - 1)
+        k_anterior = np.maximum(k - 1, 0)
+
+        d_k = distancia[k]
+        d_ant = distancia[k_anterior]
+        x_k = reatancia[registros, k]
+        x_ant = reatancia[registros, k_anterior]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            interpolada = d_k - x_k * ((d_k - d_ant) / (x_k - x_ant))
+
+        distancias[:, c] = np.where(encontrada & (k > 0), interpolada, d_k)
+        indices_linha[:, c] = linha[k]
+
+    return distancias, indices_linha
@@ -0,0 +1,38 @@
+# --- 1. IMPORTACAO DE BIBLIOTECAS E CONFIGURACOES INICIAIS ---
+# Interface de linha de comando unica para todas as etapas. Apenas a biblioteca padrao e
+# importada aqui: o modulo de cada subcomando (e, por consequencia, pandas, networkx e o
+# OpenDSS) so e carregado quando o subcomando e executado.
+import argparse
+import importlib
+import sys
+
+# Subcomando: (modulo que o implementa, descricao).
+COMANDOS = {
+    'simular': ('automacao', "Gera o dataset de faltas simuladas no OpenDSS (etapa 1)."),
+    'analisar': ('minima_reatancia', "Aplica o metodo da Minima Reatancia (etapa 2)."),
+    'analisar-paralelo': ('minima_reatancia_paralela', "Etapa 2 em todos os nucleos, com memoria compartilhada."),
+    'filtrar': ('filtroMI', "Filtra as estimativas com os medidores inteligentes (etapa 3)."),
+    'pipeline': ('pipeline', "Executa as tres etapas, reconstruindo apenas as desatualizadas."),
+    'knn': ('localizador_knn', "Localizador por vizinhos mais proximos."),
+    'sensores': ('posicionamento_sensores', "Otimiza o posicionamento dos medidores inteligentes."),
+    'servidor': ('servidor_dss', "Servidor local com motores OpenDSS aquecidos."),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='localizador.py',
+                                     description="Simulacao e localizacao de faltas no alimentador IEEE 34 Barras.",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="subcomandos:\n" + "\n".join(f"  {nome:<20}{descricao}"
+                                                                         for nome, (_, descricao) in COMANDOS.items())
+                                            + "\n\nUse 'localizador.py <subcomando> -h' para as opcoes de cada um.")
+    parser.add_argument('comando', choices=list(COMANDOS), metavar='subcomando')
+    parser.add_argument('argumentos', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    modulo, _ = COMANDOS[args.comando]
+    importlib.import_module(modulo).main(args.argumentos, prog=f'localizador.py {args.comando}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
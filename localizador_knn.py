@@ -0,0 +1,225 @@
+# --- 1. IMPORTACAO DE BIBLIOTECAS E CONFIGURACOES INICIAIS ---
+import argparse
+import os
+import pathlib
+import time
+
+import numpy as np
+
+import funcoes as fc # Importa o módulo local com as funcoes auxiliares
+
+# Define os caminhos de forma robusta, baseando-se na localizacao do script.
+script_path = os.path.dirname(os.path.abspath(__file__))
+dss_file = pathlib.Path(script_path).joinpath("34Bus", "Run_IEEE34Mod1.dss")
+
+# Medicoes fasoriais na subestacao que compoem a "impressao digital" de cada falta.
+COLUNAS_SUBESTACAO = ['va_r', 'va_i', 'vb_r', 'vb_i', 'vc_r', 'vc_i',
+                      'ia_r', 'ia_i', 'ib_r', 'ib_i', 'ic_r', 'ic_i']
+
+
+# --- 2. CONSTRUCAO E CONSULTA DO INDICE ---
+
+def colunas_caracteristicas(lista_sensores):
+    """
+        Retorna as colunas usadas como caracteristicas: fasores da subestacao seguidos das
+        magnitudes de corrente de cada sensor ('{sensor}_i{fase}').
+    """
+
+    colunas = list(COLUNAS_SUBESTACAO)
+    for sensor in lista_sensores:
+        for fase in ['a', 'b', 'c']:
+            colunas.append(f'{sensor}_i{fase}')
+    return colunas
+
+
+def construir_indice(medidas_df, colunas):
+    """
+        Constroi um indice de vizinhos mais proximos (KD-tree) para cada tipo de falta.
+
+        As caracteristicas sao normalizadas (media zero e desvio unitario) separadamente por
+        tipo de falta, pois as escalas de tensao e corrente variam muito entre os tipos.
+
+        Parametros:
+            medidas_df (pd.DataFrame): Dataset de simulacao (formato de automacao_falta.csv).
+            colunas (list): Colunas usadas como caracteristicas.
+
+        Retorna:
+            dict: Dicionario {tipo de falta: dict} com a arvore, os parametros de normalizacao,
+                  as linhas e distancias reais e o indice original de cada registro.
+    """
+
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError as erro:
+        raise ImportError("O localizador por vizinhos mais proximos requer o pacote 'scipy' "
+                          "(pip install scipy).") from erro
+
+    indice = {}
+    for tipo, grupo in medidas_df.groupby('tipo'):
+        x = grupo[colunas].to_numpy(dtype=float)
+        media = x.mean(axis=0)
+        desvio = x.std(axis=0)
+        desvio[desvio == 0] = 1.0
+
+        indice[tipo] = {'arvore': cKDTree((x - media) / desvio),
+                        'media': media,
+                        'desvio': desvio,
+                        'linha': grupo['linha_faltosa'].to_numpy(),
+                        'distancia': grupo['distancia'].to_numpy(dtype=float),
+                        'registro': grupo.index.to_numpy()}
+    return indice
+
+
+def interpolar_vizinhos(linhas, distancias, dist_caracteristica):
+    """
+        Estima a linha e a distancia de um evento a partir dos seus k vizinhos mais proximos.
+
+        A linha e escolhida por votacao ponderada pelo inverso da distancia no espaco de
+        caracteristicas; a distancia e a media ponderada dos vizinhos da linha escolhida.
+
+        Retorna:
+            tuple: (linha estimada, distancia estimada).
+    """
+
+    pesos = 1.0 / (dist_caracteristica + 1e-12)
+
+    votos = {}
+    for linha, peso in zip(linhas, pesos):
+        votos[linha] = votos.get(linha, 0.0) + peso
+    linha_estimada = max(votos, key=votos.get)
+
+    mascara = linhas == linha_estimada
+    distancia_estimada = np.average(distancias[mascara], weights=pesos[mascara])
+
+    return linha_estimada, distancia_estimada
+
+
+def localizar(indice, eventos_df, colunas, k=5, excluir_proprio=False):
+    """
+        Localiza eventos de falta consultando o indice por tipo de falta.
+
+        Parametros:
+            indice (dict): Indice retornado por construir_indice.
+            eventos_df (pd.DataFrame): Eventos a localizar, com as mesmas colunas do dataset.
+            colunas (list): Colunas usadas como caracteristicas.
+            k (int): Numero de vizinhos usados na interpolacao.
+            excluir_proprio (bool): Validacao "leave-one-out": ignora o proprio registro quando
+                                    os eventos sao o proprio dataset indexado.
+
+        Retorna:
+            tuple: (linhas, distancias) estimadas, na ordem de eventos_df. Eventos sem vizinhos
+                   (tipo de falta ausente do indice ou, no leave-one-out, com um unico registro)
+                   ficam com linha None e distancia NaN.
+    """
+
+    linhas = np.empty(eventos_df.shape[0], dtype=object)
+    distancias = np.full(eventos_df.shape[0], np.nan)
+    posicoes = {registro: i for i, registro in enumerate(eventos_df.index)}
+
+    for tipo, grupo in eventos_df.groupby('tipo'):
+        if tipo not in indice:
+            continue
+        entrada = indice[tipo]
+        n_vizinhos = min(k + int(excluir_proprio), len(entrada['linha']))
+
+        x = (grupo[colunas].to_numpy(dtype=float) - entrada['media']) / entrada['desvio']
+        dist_caracteristica, vizinhos = entrada['arvore'].query(x, k=n_vizinhos)
+        dist_caracteristica = dist_caracteristica.reshape(len(grupo), n_vizinhos)
+        vizinhos = vizinhos.reshape(len(grupo), n_vizinhos)
+
+        for j, registro in enumerate(grupo.index):
+            d_viz = dist_caracteristica[j]
+            viz = vizinhos[j]
+            if excluir_proprio:
+                manter = entrada['registro'][viz] != registro
+                # Em caso de empate o proprio registro pode nao aparecer: descarta o ultimo.
+                if manter.all():
+                    manter[-1] = False
+                d_viz = d_viz[manter]
+                viz = viz[manter]
+
+            # Tipo de falta com um unico registro: sem vizinhos, o evento fica sem estimativa (NaN).
+            if len(viz) == 0:
+                continue
+
+            linha, distancia = interpolar_vizinhos(entrada['linha'][viz], entrada['distancia'][viz], d_viz)
+            linhas[posicoes[registro]] = linha
+            distancias[posicoes[registro]] = distancia
+
+    return linhas, distancias
+
+
+# --- 3. EXECUCAO PRINCIPAL ---
+
+def main(argv=None, prog=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(prog=prog, description="Localizador de faltas por banco de impressoes digitais "
+                                                 "e vizinhos mais proximos.")
+    parser.add_argument('--k', type=int, default=5, help="Numero de vizinhos usados na interpolacao.")
+    parser.add_argument('--eventos', type=pathlib.Path,
+                        help="CSV de eventos a localizar (formato de automacao_falta.csv). Se omitido, "
+                             "o proprio dataset e avaliado por validacao leave-one-out.")
+    args = parser.parse_args(argv)
+
+    pasta_resultado = pathlib.Path(script_path).joinpath("result")
+    medidas_df = pd.read_csv(pasta_resultado.joinpath("automacao_falta.csv"), sep=';', decimal=',')
+
+    # Mesmos sensores usados pelo filtro de medidores inteligentes.
+    lista_sensores = fc.lista_sensores_fc(fc.create_network_graph())
+    colunas = colunas_caracteristicas(lista_sensores)
+
+    inicio = time.perf_counter()
+    indice = construir_indice(medidas_df, colunas)
+    tempo_indice = time.perf_counter() - inicio
+
+    if args.eventos is None:
+        eventos_df = medidas_df
+    else:
+        eventos_df = pd.read_csv(args.eventos, sep=';', decimal=',')
+
+    inicio = time.perf_counter()
+    linhas, distancias = localizar(indice, eventos_df, colunas, k=args.k, excluir_proprio=args.eventos is None)
+    tempo_consulta = time.perf_counter() - inicio
+
+    # --- 4. POS-PROCESSAMENTO E EXPORTACÃO DOS RESULTADOS ---
+
+    # Os comprimentos sao lidos do arquivo do modelo; o simulador nao e necessario.
+    comprimentos = fc.comprimentos_linhas(dss_file)
+    length_ramal = sum(comprimentos[sec_linha] * 304.8 for sec_linha in fc.ramal_principal_func())
+
+    # Mesmo formato de filtragem_MI.csv, para comparacao direta com o metodo da Minima Reatancia.
+    # Eventos reais podem nao ter rotulos: os dados da falta e o erro so sao gravados se existirem.
+    rotulados = {'linha_faltosa', 'distancia', 'r_f'}.issubset(eventos_df.columns)
+
+    df_resultado = pd.DataFrame({'linha_identificada': linhas,
+                                 'distancia_identificada': distancias})
+    if rotulados:
+        df_resultado['linha_faltosa'] = eventos_df['linha_faltosa'].to_numpy()
+        df_resultado['distancia real'] = eventos_df['distancia'].to_numpy()
+    df_resultado['tipo_de_falta'] = eventos_df['tipo'].to_numpy()
+    if rotulados:
+        df_resultado['r_f'] = eventos_df['r_f'].to_numpy()
+        df_resultado['erro'] = 100 * ((df_resultado['distancia_identificada'] - df_resultado['distancia real']) / length_ramal)
+
+    df_resultado.to_csv(pasta_resultado.joinpath("fingerprint_knn.csv"), sep=';', decimal=',')
+
+    print(f"Indice construido em {tempo_indice:.3f} s ({medidas_df.shape[0]} registros, {len(indice)} tipos de falta).")
+    print(f"Latencia media por evento: {1e6 * tempo_consulta / max(eventos_df.shape[0], 1):.1f} us")
+    if rotulados:
+        print(f"Vizinhos mais proximos: acerto da linha {100 * (df_resultado['linha_identificada'] == df_resultado['linha_faltosa']).mean():.2f}%"
+              f", |erro| medio {df_resultado['erro'].abs().mean():.4f}%")
+
+    # Comparacao com o metodo da Minima Reatancia, quando os eventos sao o proprio dataset.
+    arquivo_mi = pasta_resultado.joinpath("filtragem_MI.csv")
+    if args.eventos is None and arquivo_mi.is_file():
+        filtragem = pd.read_csv(arquivo_mi, sep=';', decimal=',')
+        if filtragem.shape[0] == df_resultado.shape[0]:
+            print(f"Minima Reatancia + MI: acerto da linha {100 * (filtragem['linha_identificada'] == filtragem['linha_faltosa']).mean():.2f}%"
+                  f", |erro| medio {filtragem['erro'].abs().mean():.4f}%")
+
+    print('Localizacao por vizinhos mais proximos concluida com sucesso!')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+# --- 1. IMPORTACAO DE BIBLIOTECAS E CONFIGURACOES INICIAIS ---
+# pandas, tqdm e o OpenDSS sao usados apenas no processo principal e importados em main(),
+# de modo que os processos trabalhadores importam somente numpy e funcoes.
+import argparse
+import os
+import pathlib
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+import funcoes as fc # Importa o módulo local com as funcoes auxiliares
+
+# Define os caminhos de forma robusta, garantindo que o script encontre os arquivos.
+script_path = os.path.dirname(os.path.abspath(__file__))
+dss_file = pathlib.Path(script_path).joinpath("34Bus", "Run_IEEE34Mod1.dss")
+
+# Ordem das colunas de medicao na subestacao dentro do array compartilhado.
+COLUNAS_MEDIDAS = ['va_r', 'va_i', 'vb_r', 'vb_i', 'vc_r', 'vc_i',
+                   'ia_r', 'ia_i', 'ib_r', 'ib_i', 'ic_r', 'ic_i']
+
+# Arrays anexados a memoria compartilhada em cada processo trabalhador.
+_compartilhado = {}
+
+
+# --- 2. FUNCOES DE MEMORIA COMPARTILHADA ---
+
+def criar_compartilhado(array, blocos):
+    """
+        Copia um array do NumPy para um bloco novo de memoria compartilhada.
+
+        Parametros:
+            array (np.ndarray): Array a ser publicado para os processos trabalhadores.
+            blocos (list): Lista onde o SharedMemory criado e registrado para liberacao posterior.
+
+        Retorna:
+            tuple: (descritor, destino), onde 'descritor' = (nome, formato, dtype) permite
+                   anexar o bloco em outro processo e 'destino' e a visao local do bloco.
+    """
+
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocos.append(shm)
+    destino = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    destino[...] = array
+    return (shm.name, array.shape, array.dtype.str), destino
+
+
+def anexar_compartilhado(descritor):
+    """
+        Anexa um bloco de memoria compartilhada e o expoe como array, sem copia.
+
+        Retorna:
+            tuple: (SharedMemory, np.ndarray). O SharedMemory deve permanecer referenciado
+                   enquanto o array estiver em uso.
+    """
+
+    nome, formato, dtype = descritor
+    shm = shared_memory.SharedMemory(name=nome)
+    return shm, np.ndarray(formato, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def inicializar_trabalhador(descritores, nomes_tipos):
+    """
+        Inicializador do Pool: anexa, uma unica vez por processo, as medicoes, as tabelas
+        de impedancia/admitancia e os buffers de saida.
+    """
+
+    _compartilhado['shm'] = []
+    for chave, descritor in descritores.items():
+        shm, array = anexar_compartilhado(descritor)
+        _compartilhado['shm'].append(shm)
+        _compartilhado[chave] = array
+    _compartilhado['nomes_tipos'] = nomes_tipos
+
+
+def processar_intervalo(intervalo):
+    """
+        Localiza as faltas dos registros [inicio, fim) e escreve o resultado diretamente
+        nos buffers de saida compartilhados.
+
+        Retorna:
+            int: Numero de registros processados.
+    """
+
+    inicio, fim = intervalo
+    medidas = _compartilhado['medidas'][inicio:fim]
+    tipos = _compartilhado['tipos'][inicio:fim]
+    tabelas = {chave: _compartilhado[chave] for chave in ['z_montante', 'yeq', 'distancia', 'linha', 'inicio']}
+
+    v_falta = medidas[:, 0:6:2] + 1j * medidas[:, 1:6:2]
+    i_falta = medidas[:, 6:12:2] + 1j * medidas[:, 7:12:2]
+
+    # O calculo da reatancia depende do tipo de falta, entao o bloco e separado por tipo.
+    for codigo in np.unique(tipos):
+        mascara = tipos == codigo
+        distancias, indices_linha = fc.minima_reatancia_vetorizada(v_falta[mascara], i_falta[mascara],
+                                                                   _compartilhado['nomes_tipos'][codigo], tabelas)
+        posicoes = inicio + np.flatnonzero(mascara)
+        _compartilhado['saida_d'][posicoes] = distancias
+        _compartilhado['saida_linha'][posicoes] = indices_linha
+
+    return fim - inicio
+
+
+# --- 3. EXECUCAO PRINCIPAL ---
+
+def main(argv=None, prog=None):
+    import pandas as pd
+    from tqdm import tqdm
+
+    parser = argparse.ArgumentParser(prog=prog, description="Metodo da Minima Reatancia em paralelo com memoria compartilhada.")
+    parser.add_argument('--processos', type=int, default=os.cpu_count(),
+                        help="Numero de processos trabalhadores (padrao: todos os nucleos).")
+    parser.add_argument('--bloco', type=int, default=256,
+                        help="Numero de registros enviados a cada tarefa.")
+    args = parser.parse_args(argv)
+
+    # O OpenDSS e usado apenas no processo principal, para os dados de pre-falta e das linhas.
+    dss = fc.iniciar_dss(dss_file)
+
+    medidas_df = pd.read_csv(pathlib.Path(script_path).joinpath("result", "automacao_falta.csv"), sep=';', decimal=',')
+
+    alimentador = fc.dict_circuitos_func()
+    G = fc.create_network_graph()
+    lista_sensores = fc.lista_sensores_fc(G)
+    data = fc.processamento(dss)
+
+    Vpre, Ipre = fc.pre_falta(dss)
+
+    # As tabelas sao calculadas uma unica vez e compartilhadas por todos os processos.
+    tabelas, linhas = fc.tabelas_minima_reatancia(alimentador, data, Vpre, Ipre)
+
+    nomes_tipos = sorted(medidas_df['tipo'].astype(str).unique())
+    codigos_tipos = medidas_df['tipo'].astype(str).map({tipo: i for i, tipo in enumerate(nomes_tipos)})
+
+    n_registros = medidas_df.shape[0]
+    n_circuitos = len(alimentador)
+
+    # Apenas os nomes dos blocos sao enviados aos trabalhadores; os dados nunca sao serializados.
+    blocos = []
+    visoes = {}
+    try:
+        arrays = {'medidas': medidas_df[COLUNAS_MEDIDAS].to_numpy(dtype=np.float64),
+                  'tipos': codigos_tipos.to_numpy(dtype=np.int16),
+                  'saida_d': np.zeros((n_registros, n_circuitos)),
+                  'saida_linha': np.zeros((n_registros, n_circuitos), dtype=np.int32),
+                  **tabelas}
+        descritores = {}
+        for chave, array in arrays.items():
+            descritores[chave], visoes[chave] = criar_compartilhado(array, blocos)
+        del arrays
+
+        intervalos = [(i, min(i + args.bloco, n_registros)) for i in range(0, n_registros, args.bloco)]
+
+        with Pool(processes=args.processos, initializer=inicializar_trabalhador,
+                  initargs=(descritores, nomes_tipos)) as pool:
+            with tqdm(total=n_registros, desc="Analisando Casos de Falta") as pbar:
+                for n in pool.imap_unordered(processar_intervalo, intervalos):
+                    pbar.update(n)
+
+        saida_d = visoes['saida_d'].copy()
+        saida_linha = visoes['saida_linha'].copy()
+    finally:
+        # As visoes locais precisam ser descartadas antes de fechar os blocos.
+        visoes.clear()
+        for shm in blocos:
+            shm.close()
+            shm.unlink()
+
+    # --- 4. PÓS-PROCESSAMENTO E EXPORTACAO DOS DADOS ---
+
+    # Mesmo formato de saida de minima_reatancia.py, para que filtroMI.py possa ser usado em seguida.
+    min_reat_data = {}
+    for c in range(n_circuitos):
+        min_reat_data[f'ckt{c+1}_d'] = saida_d[:, c] * 304.8
+    for c in range(n_circuitos):
+        min_reat_data[f'ckt{c+1}_line'] = np.array(linhas)[saida_linha[:, c]]
+
+    min_reat_data['distancia real'] = medidas_df['distancia']
+    min_reat_data['linha_faltosa'] = medidas_df['linha_faltosa']
+    min_reat_data['tipo_de_falta'] = medidas_df['tipo']
+    min_reat_data['r_f'] = medidas_df['r_f']
+
+    resultado_estimativa_df = pd.DataFrame(min_reat_data)
+
+    colunas_adicionar = []
+    for sensor in lista_sensores:
+        for fase in ['a', 'b', 'c']:
+            colunas_adicionar.append(f'{sensor}_i{fase}')
+
+    resultado_estimativa_df = resultado_estimativa_df.join(medidas_df[colunas_adicionar])
+
+    resultado_estimativa_df.to_csv(pathlib.Path(script_path).joinpath("result", "minima_reatancia.csv"), sep=';', decimal=',')
+
+    print("\nAnálise concluida e resultados salvos com sucesso!")
+
+
+if __name__ == '__main__':
+    main()
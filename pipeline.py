@@ -0,0 +1,286 @@
+# --- 1. IMPORTACAO DE BIBLIOTECAS E CONFIGURACOES INICIAIS ---
+import argparse
+import ast
+import hashlib
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+# Define os caminhos de forma robusta, baseando-se na localizacao do script.
+script_path = pathlib.Path(os.path.dirname(os.path.abspath(__file__)))
+pasta_resultado = script_path.joinpath("result")
+arquivo_estado = pasta_resultado.joinpath("pipeline_estado.json")
+
+# Arquivos do modelo OpenDSS: qualquer alteracao no modelo invalida todas as etapas.
+arquivos_dss = sorted(p for p in script_path.joinpath("34Bus").iterdir() if p.is_file())
+
+# Modulo de funcoes auxiliares compartilhado pelas etapas. Apenas as funcoes que cada etapa
+# efetivamente utiliza entram no seu hash (ver funcoes_utilizadas).
+modulo_funcoes = 'funcoes.py'
+
+# Definicao das tres etapas, na ordem de execucao. Cada etapa declara o script que a executa,
+# os arquivos de entrada e o arquivo de saida.
+# Os parametros de execucao (ex: passo da varredura) fazem parte do hash das entradas; os
+# valores padrao definidos no proprio script fazem parte do hash do codigo.
+ETAPAS = {
+    'automacao': {'script': 'automacao.py',
+                  'entradas': [],
+                  'saida': 'automacao_falta.csv'},
+    'minima_reatancia': {'script': 'minima_reatancia.py',
+                         'entradas': ['automacao_falta.csv'],
+                         'saida': 'minima_reatancia.csv'},
+    'filtroMI': {'script': 'filtroMI.py',
+                 'entradas': ['minima_reatancia.csv'],
+                 'saida': 'filtragem_MI.csv'},
+}
+
+
+# --- 2. FUNCOES DE HASH E ESTADO ---
+
+def hash_arquivo(caminho):
+    """
+        Calcula o hash SHA-256 do conteudo de um arquivo, lendo-o em blocos.
+
+        Retorna:
+            str: O hash em hexadecimal, ou None se o arquivo nao existir.
+    """
+
+    if not caminho.is_file():
+        return None
+
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def ler_ast(caminho):
+    """Le e interpreta um arquivo de codigo Python, retornando a sua arvore sintatica."""
+
+    with open(caminho, encoding='utf-8') as f:
+        return ast.parse(f.read(), filename=str(caminho))
+
+
+def funcoes_utilizadas(script):
+    """
+        Determina as funcoes de funcoes.py das quais um script depende: as chamadas no script
+        (ex: 'fc.processamento') e, recursivamente, as funcoes de funcoes.py chamadas por elas.
+
+        Retorna:
+            dict: Dicionario {nome da funcao: no ast.FunctionDef}, em ordem alfabetica.
+    """
+
+    definicoes = {no.name: no for no in ler_ast(script_path.joinpath(modulo_funcoes)).body
+                  if isinstance(no, ast.FunctionDef)}
+
+    # Nomes pelos quais o script importa o modulo (ex: 'import funcoes as fc').
+    arvore_script = ler_ast(script_path.joinpath(script))
+    apelidos = {apelido.asname or apelido.name
+                for no in ast.walk(arvore_script) if isinstance(no, ast.Import)
+                for apelido in no.names if apelido.name == pathlib.Path(modulo_funcoes).stem}
+
+    pendentes = [no.attr for no in ast.walk(arvore_script)
+                 if isinstance(no, ast.Attribute) and isinstance(no.value, ast.Name) and no.value.id in apelidos]
+    utilizadas = {}
+    while pendentes:
+        nome = pendentes.pop()
+        if nome in utilizadas or nome not in definicoes:
+            continue
+        utilizadas[nome] = definicoes[nome]
+        pendentes += [no.id for no in ast.walk(definicoes[nome]) if isinstance(no, ast.Name)]
+
+    return dict(sorted(utilizadas.items()))
+
+
+def hash_funcao(no):
+    """
+        Calcula o hash de uma funcao a partir da sua arvore sintatica, sem a docstring: alteracoes
+        apenas em comentarios, docstrings ou formatacao nao invalidam a etapa.
+    """
+
+    corpo = no.body
+    if corpo and isinstance(corpo[0], ast.Expr) and isinstance(corpo[0].value, ast.Constant) \
+            and isinstance(corpo[0].value.value, str):
+        corpo = corpo[1:]
+    conteudo = ast.dump(ast.Module(body=corpo, type_ignores=[])) + ast.dump(no.args) \
+        + ''.join(ast.dump(d) for d in no.decorator_list)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def hash_entradas(etapa, script, parametros):
+    """
+        Combina em um unico hash tudo o que determina a saida de uma etapa: arquivos do modelo
+        DSS, codigo da etapa (script e funcoes de funcoes.py que ele utiliza), arquivos de
+        entrada vindos da etapa anterior e parametros de execucao.
+
+        Parametros:
+            etapa (dict): Definicao da etapa em ETAPAS.
+            script (str): Nome do script efetivamente usado para executar a etapa.
+            parametros (dict): Parametros adicionais que influenciam a saida.
+
+        Retorna:
+            str: O hash combinado em hexadecimal.
+    """
+
+    componentes = []
+    for caminho in arquivos_dss:
+        componentes.append(('dss', caminho.name, hash_arquivo(caminho)))
+    componentes.append(('codigo', script, hash_arquivo(script_path.joinpath(script))))
+    # Instrucoes de nivel de modulo de funcoes.py (importacoes e constantes).
+    nivel_modulo = [no for no in ler_ast(script_path.joinpath(modulo_funcoes)).body
+                    if not isinstance(no, (ast.FunctionDef, ast.ClassDef))
+                    and not (isinstance(no, ast.Expr) and isinstance(no.value, ast.Constant))]
+    componentes.append(('modulo', modulo_funcoes, hashlib.sha256(
+        ast.dump(ast.Module(body=nivel_modulo, type_ignores=[])).encode('utf-8')).hexdigest()))
+    for nome, no in funcoes_utilizadas(script).items():
+        componentes.append(('funcao', nome, hash_funcao(no)))
+    for nome in etapa['entradas']:
+        componentes.append(('entrada', nome, hash_arquivo(pasta_resultado.joinpath(nome))))
+    componentes.append(('parametros', json.dumps(parametros, sort_keys=True)))
+
+    return hashlib.sha256(json.dumps(componentes).encode('utf-8')).hexdigest()
+
+
+def carregar_estado():
+    """Le o registro de hashes das execucoes anteriores (vazio se ainda nao existir)."""
+
+    if not arquivo_estado.is_file():
+        return {}
+    with open(arquivo_estado, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def salvar_estado(estado):
+    """Grava o registro de hashes de forma atomica, para nao corromper o arquivo se interrompido."""
+
+    temporario = arquivo_estado.with_suffix('.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, sort_keys=True)
+    os.replace(temporario, arquivo_estado)
+
+
+def etapa_valida(nome, hash_atual, estado):
+    """
+        Verifica se a saida de uma etapa ainda corresponde as entradas atuais.
+
+        A saida e valida se foi gerada com o mesmo hash de entradas e se o proprio arquivo de
+        saida nao foi alterado ou removido desde entao.
+    """
+
+    registro = estado.get(nome)
+    if registro is None or registro['hash_entradas'] != hash_atual:
+        return False
+    return hash_arquivo(pasta_resultado.joinpath(ETAPAS[nome]['saida'])) == registro['hash_saida']
+
+
+# --- 3. EXECUCAO DAS ETAPAS ---
+
+def parametros_automacao(parametros_simulacao=None):
+    """
+        Completa os parametros de automacao.py com os valores padrao do proprio script, para que
+        a mesma simulacao tenha sempre o mesmo hash, tenha o parametro sido informado ou nao
+        (ex: 'pipeline.py' e 'pipeline.py --passo 0.1').
+
+        Parametros:
+            parametros_simulacao (dict): Argumentos informados (ex: {'--passo': 0.05}); valores
+                                         None sao substituidos pelo padrao.
+
+        Retorna:
+            dict: {'--passo': float, '--todas-linhas': bool}.
+    """
+
+    import automacao
+
+    informados = {chave: valor for chave, valor in (parametros_simulacao or {}).items() if valor is not None}
+    return {'--passo': float(informados.get('--passo', automacao.passo)),
+            '--todas-linhas': bool(informados.get('--todas-linhas', False))}
+
+
+def executar(ate=None, forcar=(), paralelo=False, apenas_verificar=False, parametros_simulacao=None):
+    """
+        Executa as etapas do pipeline em ordem, reconstruindo apenas as que estiverem desatualizadas.
+
+        Parametros:
+            ate (str): Ultima etapa a ser considerada (padrao: todas).
+            forcar (iterable): Nomes das etapas que devem ser executadas mesmo se validas.
+            paralelo (bool): Usa minima_reatancia_paralela.py na segunda etapa.
+            apenas_verificar (bool): Apenas informa o estado de cada etapa, sem executar nada.
+            parametros_simulacao (dict): Argumentos de linha de comando de automacao.py
+                                         (ex: {'--passo': 0.05}); valores None assumem o
+                                         padrao de automacao.py.
+
+        Retorna:
+            dict: Situacao de cada etapa ('valida', 'executada' ou 'desatualizada').
+    """
+
+    pasta_resultado.mkdir(exist_ok=True)
+    estado = carregar_estado()
+    situacao = {}
+    anterior_desatualizada = False
+
+    for nome, etapa in ETAPAS.items():
+        script = etapa['script']
+        if nome == 'minima_reatancia' and paralelo:
+            script = 'minima_reatancia_paralela.py'
+
+        parametros = {}
+        if nome == 'automacao':
+            parametros = parametros_automacao(parametros_simulacao)
+
+        hash_atual = hash_entradas(etapa, script, parametros)
+
+        if nome not in forcar and not anterior_desatualizada and etapa_valida(nome, hash_atual, estado):
+            situacao[nome] = 'valida'
+            print(f"[{nome}] saida valida, etapa ignorada.")
+        elif apenas_verificar:
+            # Sem executar a etapa anterior nao ha como saber o hash da sua nova saida.
+            anterior_desatualizada = True
+            situacao[nome] = 'desatualizada'
+            print(f"[{nome}] desatualizada.")
+        else:
+            print(f"[{nome}] executando {script}...")
+            argumentos = []
+            for chave, valor in parametros.items():
+                if valor is True:
+                    argumentos.append(chave)
+                elif valor is not False:
+                    argumentos += [chave, repr(valor)]
+            subprocess.run([sys.executable, str(script_path.joinpath(script))] + argumentos,
+                           check=True, cwd=script_path)
+
+            estado[nome] = {'hash_entradas': hash_atual,
+                            'hash_saida': hash_arquivo(pasta_resultado.joinpath(etapa['saida']))}
+            salvar_estado(estado)
+            situacao[nome] = 'executada'
+
+        if nome == ate:
+            break
+
+    return situacao
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Executa as etapas de simulacao, analise e filtragem "
+                                                 "reconstruindo apenas as saidas desatualizadas.")
+    parser.add_argument('--ate', choices=list(ETAPAS), help="Ultima etapa a executar.")
+    parser.add_argument('--forcar', nargs='+', choices=list(ETAPAS), default=[],
+                        help="Etapas a executar mesmo que a saida seja valida.")
+    parser.add_argument('--paralelo', action='store_true',
+                        help="Usa a versao paralela da Minima Reatancia.")
+    parser.add_argument('--verificar', action='store_true',
+                        help="Apenas informa quais etapas estao desatualizadas.")
+    parser.add_argument('--passo', type=float, help="Passo de varredura repassado a automacao.py (deve dividir 1 em partes iguais).")
+    parser.add_argument('--todas-linhas', action='store_true',
+                        help="Registra as correntes de todas as linhas na simulacao (automacao.py).")
+    args = parser.parse_args(argv)
+
+    parametros_simulacao = {'--passo': args.passo, '--todas-linhas': True if args.todas_linhas else None}
+    executar(ate=args.ate, forcar=args.forcar, paralelo=args.paralelo, apenas_verificar=args.verificar,
+             parametros_simulacao=parametros_simulacao)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+# --- 1. IMPORTACAO DE BIBLIOTECAS E CONFIGURACOES INICIAIS ---
+import argparse
+import os
+import pathlib
+import time
+
+import numpy as np
+
+import funcoes as fc # Importa o módulo local com as funcoes auxiliares
+
+# Define os caminhos de forma robusta, baseando-se na localizacao do script.
+script_path = os.path.dirname(os.path.abspath(__file__))
+dss_file = pathlib.Path(script_path).joinpath("34Bus", "Run_IEEE34Mod1.dss")
+
+# Fase da corrente do sensor analisada para cada tipo de falta (mesma regra de filtroMI.py).
+FASE_POR_TIPO = {'.1.0': 0, '.1.2': 0, '.1.2.0': 0, '.3.1': 0, '.3.1.0': 0, '.1.3': 0, '.1.3.0': 0, '.1.2.3.0': 0,
+                 '.2.0': 1, '.2.3': 1, '.2.3.0': 1,
+                 '.3.0': 2}
+
+# Numero maximo de valores (layouts x registros x circuitos) avaliados de uma so vez.
+LIMITE_ELEMENTOS = 20_000_000
+
+
+# --- 2. PREPARACAO DOS DADOS ---
+
+def caminho_ate_raiz(g, origem, linha):
+    """
+        Retorna as linhas no caminho entre a linha informada e a subestacao, comecando pela
+        propria linha e terminando na linha ligada a origem.
+    """
+
+    import networkx as nx
+
+    for u, v, data in g.edges(data=True):
+        if data['label'] == linha:
+            nos = nx.shortest_path(g, origem, v)
+            return [g.edges[a, b]['label'] for a, b in zip(nos[:-1], nos[1:])][::-1]
+    return []
+
+
+def preparar_dados(medidas_df, estimativas_df, candidatos, g):
+    """
+        Converte os DataFrames em arrays do NumPy usados na avaliacao vetorizada.
+
+        Parametros:
+            medidas_df (pd.DataFrame): Dataset de simulacao com as correntes de todas as candidatas.
+            estimativas_df (pd.DataFrame): Estimativas de minima_reatancia.csv (mesma ordem de linhas).
+            candidatos (list): Linhas candidatas a receber um sensor.
+            g (nx.DiGraph): O grafo da rede.
+
+        Retorna:
+            dict: 'leituras' (n, candidatos, 3), 'fase' (n,), 'estimada' (n, circuitos) com indices
+                  das linhas estimadas, 'distancia' (n, circuitos), 'real' (n,), 'ancestrais'
+                  (linhas estimadas, profundidade) com indices de candidatos (-1 = vazio),
+                  'posicao' (linhas estimadas, candidatos) com a posicao do candidato no caminho,
+                  'contem' (n, linhas estimadas), 'leitura_fase' (n, candidatos) com a leitura na fase de
+                  interesse, 'linhas' (nomes das linhas estimadas) e 'distancia_real' (n,).
+    """
+
+    n_circuitos = len([c for c in estimativas_df.columns if c.endswith('_line')])
+
+    leituras = np.stack([medidas_df[[f'{c}_ia', f'{c}_ib', f'{c}_ic']].to_numpy(dtype=float) for c in candidatos], axis=1)
+    fase = estimativas_df['tipo_de_falta'].astype(str).map(FASE_POR_TIPO).to_numpy(dtype=np.int64)
+
+    nomes_estimados = estimativas_df[[f'ckt{i+1}_line' for i in range(n_circuitos)]].to_numpy().astype(str)
+    linhas, estimada = np.unique(nomes_estimados, return_inverse=True)
+    estimada = estimada.reshape(nomes_estimados.shape)
+
+    posicao = {linha: i for i, linha in enumerate(linhas)}
+    real = estimativas_df['linha_faltosa'].astype(str).map(posicao).fillna(-1).to_numpy(dtype=np.int64)
+
+    # Para cada linha estimada, os candidatos a montante do mais proximo ao mais distante.
+    indice_candidato = {c: i for i, c in enumerate(candidatos)}
+    caminhos = [[indice_candidato[l] for l in caminho_ate_raiz(g, '800', linha) if l in indice_candidato]
+                for linha in linhas]
+    profundidade = max(len(c) for c in caminhos)
+    ancestrais = np.full((len(linhas), profundidade), -1, dtype=np.int64)
+    for i, caminho in enumerate(caminhos):
+        ancestrais[i, :len(caminho)] = caminho
+
+    # Posicao de cada candidato no caminho de cada linha estimada (inf = fora do caminho).
+    posicao = np.full((len(linhas), len(candidatos)), np.inf)
+    for i, caminho in enumerate(caminhos):
+        posicao[i, caminho] = np.arange(len(caminho))
+
+    # Incidencia registro x linha: 1 se a linha aparece entre as estimativas do registro.
+    contem = np.zeros((len(fase), len(linhas)), dtype=np.float32)
+    contem[np.arange(len(fase))[:, None], estimada] = 1.0
+
+    distancia = estimativas_df[[f'ckt{i+1}_d' for i in range(n_circuitos)]].to_numpy(dtype=float)
+
+    return {'leituras': leituras, 'fase': fase, 'estimada': estimada, 'distancia': distancia,
+            'real': real, 'ancestrais': ancestrais, 'linhas': linhas, 'posicao': posicao,
+            'contem': contem,
+            'leitura_fase': leituras[np.arange(len(fase)), :, fase],
+            'distancia_real': estimativas_df['distancia real'].to_numpy(dtype=float)}
+
+
+# --- 3. AVALIACAO VETORIZADA DOS LAYOUTS ---
+
+def sensores_responsaveis(mascaras, ancestrais):
+    """
+        Determina, para cada layout, o sensor responsavel por cada linha estimada: o sensor
+        instalado mais proximo a montante da linha (ou na propria linha).
+
+        Parametros:
+            mascaras (np.ndarray): Layouts a avaliar, formato (layouts, candidatos), dtype bool.
+            ancestrais (np.ndarray): Indices de candidatos a montante, formato (linhas, profundidade).
+
+        Retorna:
+            np.ndarray: Indice do candidato responsavel, formato (layouts, linhas).
+    """
+
+    instalado = mascaras[:, np.maximum(ancestrais, 0)] & (ancestrais >= 0)
+    primeiro = instalado.argmax(axis=2)
+    return np.take_along_axis(ancestrais[None], primeiro[..., None], axis=2)[..., 0]
+
+
+def avaliar_layouts(mascaras, dados, length_ramal):
+    """
+        Avalia o filtro de medidores inteligentes para varios layouts de sensores de uma vez.
+
+        Para cada layout, cada registro e cada circuito, le-se a corrente do sensor responsavel
+        pela linha estimada; o circuito escolhido e o de maior corrente (argmax), como em filtroMI.py.
+
+        Parametros:
+            mascaras (np.ndarray): Layouts a avaliar, formato (layouts, candidatos), dtype bool.
+            dados (dict): Arrays retornados por preparar_dados.
+            length_ramal (float): Comprimento do ramal principal em metros, base do erro percentual.
+
+        Retorna:
+            tuple: (acerto, erro_medio), arrays de formato (layouts,) com a fracao de registros em
+                   que a linha faltosa foi identificada e o |erro| percentual medio.
+    """
+
+    responsavel = sensores_responsaveis(mascaras, dados['ancestrais'])
+    n_registros, n_circuitos = dados['estimada'].shape
+    registros = np.arange(n_registros)
+
+    # Leitura de cada candidato na fase de interesse de cada registro: (n, candidatos).
+    leitura_fase = dados['leitura_fase']
+
+    acerto = np.empty(len(mascaras))
+    erro_medio = np.empty(len(mascaras))
+    passo = max(1, LIMITE_ELEMENTOS // (n_registros * n_circuitos))
+
+    for inicio in range(0, len(mascaras), passo):
+        sensores = responsavel[inicio:inicio + passo][:, dados['estimada']]
+        leitura = np.take_along_axis(leitura_fase[None], sensores, axis=2)
+        escolha = leitura.argmax(axis=2)
+
+        linha_escolhida = np.take_along_axis(dados['estimada'][None], escolha[..., None], axis=2)[..., 0]
+        distancia_escolhida = dados['distancia'][registros, escolha]
+
+        acerto[inicio:inicio + passo] = (linha_escolhida == dados['real']).mean(axis=1)
+        erro_medio[inicio:inicio + passo] = 100 * np.abs(distancia_escolhida - dados['distancia_real']).mean(axis=1) / length_ramal
+
+    return acerto, erro_medio
+
+
+def resultado_registros(leitura, registros, dados):
+    """
+        Aplica o filtro (argmax da leitura entre os circuitos) a um subconjunto de registros.
+
+        Retorna:
+            tuple: (escolha, acerto, erro), arrays de formato (registros,) com o circuito escolhido,
+                   o acerto da linha e o |erro| absoluto da distancia, em metros.
+    """
+
+    escolha = leitura.argmax(axis=1)
+    acerto = dados['estimada'][registros, escolha] == dados['real'][registros]
+    erro = np.abs(dados['distancia'][registros, escolha] - dados['distancia_real'][registros])
+    return escolha, acerto, erro
+
+
+def estado_layout(mascara, dados):
+    """
+        Calcula o estado do filtro para um layout: a leitura usada em cada (registro, circuito),
+        a linha escolhida e o resultado de cada registro e a posicao do sensor responsavel por
+        cada linha estimada.
+    """
+
+    responsavel = sensores_responsaveis(mascara[None], dados['ancestrais'])[0]
+    leitura = np.take_along_axis(dados['leitura_fase'], responsavel[dados['estimada']], axis=1)
+    registros = np.arange(len(leitura))
+    escolha, acerto, erro = resultado_registros(leitura, registros, dados)
+
+    # Linhas sem sensor instalado a montante: qualquer sensor adicionado no caminho assume.
+    posicao_responsavel = np.where(mascara[responsavel],
+                                   dados['posicao'][np.arange(len(responsavel)), responsavel], np.inf)
+
+    return {'leitura': leitura, 'maior_leitura': leitura[registros, escolha],
+            'linha_escolhida': dados['estimada'][registros, escolha], 'acerto': acerto, 'erro': erro,
+            'posicao_responsavel': posicao_responsavel}
+
+
+def avaliar_adicoes(estado, livres, dados, length_ramal):
+    """
+        Avalia, de forma incremental, os layouts obtidos ao adicionar cada candidato livre ao
+        layout atual.
+
+        Um novo sensor so muda o sensor responsavel das linhas estimadas a jusante dele (e mais
+        proximas dele do que do responsavel atual); todas passam a usar a leitura do novo sensor.
+        O argmax so e recalculado nos registros que contem essas linhas e em que a escolha pode
+        mudar: o circuito escolhido foi afetado ou a nova leitura alcanca a maior leitura atual.
+        Os demais registros mantem o resultado guardado em 'estado'.
+
+        Parametros:
+            estado (dict): Estado do layout atual, retornado por estado_layout.
+            livres (np.ndarray): Indices dos candidatos ainda sem sensor.
+            dados (dict): Arrays retornados por preparar_dados.
+            length_ramal (float): Comprimento do ramal principal em metros, base do erro percentual.
+
+        Retorna:
+            tuple: (acerto, erro_medio), arrays de formato (livres,), como em avaliar_layouts.
+    """
+
+    acerto = np.empty(len(livres))
+    erro_medio = np.empty(len(livres))
+
+    # Linhas afetadas por cada candidato (livres, linhas) e registros que contem alguma delas (n, livres).
+    afetadas = dados['posicao'][:, livres].T < estado['posicao_responsavel']
+    registro_afetado = (dados['contem'] @ afetadas.T.astype(np.float32)) > 0
+
+    for k, candidato in enumerate(livres):
+        nova_leitura = dados['leitura_fase'][:, candidato]
+        pode_mudar = registro_afetado[:, k] & (afetadas[k][estado['linha_escolhida']]
+                                                | (nova_leitura >= estado['maior_leitura']))
+        acerto_novo = estado['acerto'].copy()
+        erro_novo = estado['erro'].copy()
+
+        registros = np.flatnonzero(pode_mudar)
+        if len(registros):
+            pares = afetadas[k][dados['estimada'][registros]]
+            leitura = np.where(pares, nova_leitura[registros, None], estado['leitura'][registros])
+            _, acerto_novo[registros], erro_novo[registros] = resultado_registros(leitura, registros, dados)
+
+        acerto[k] = acerto_novo.mean()
+        erro_medio[k] = 100 * erro_novo.mean() / length_ramal
+
+    return acerto, erro_medio
+
+
+def busca_gulosa(dados, candidatos, n_sensores, fixos, length_ramal):
+    """
+        Seleciona sensores de forma gulosa: a cada passo, todos os layouts com um sensor a mais
+        sao avaliados (de forma incremental, a partir do estado do layout atual) e o de maior
+        acerto (desempate pelo menor erro) e mantido.
+
+        Retorna:
+            tuple: (historico, layouts avaliados), onde 'historico' e uma lista de dicts por passo.
+    """
+
+    atual = np.zeros(len(candidatos), dtype=bool)
+    for sensor in fixos:
+        atual[candidatos.index(sensor)] = True
+
+    estado = estado_layout(atual, dados)
+    historico = [{'n_sensores': int(atual.sum()), 'sensor_adicionado': '',
+                  'sensores': ' '.join(np.array(candidatos)[atual]), 'acerto': estado['acerto'].mean(),
+                  'erro_medio': 100 * estado['erro'].mean() / length_ramal}]
+    avaliados = 1
+
+    while atual.sum() < n_sensores and not atual.all():
+        livres = np.flatnonzero(~atual)
+
+        acerto, erro = avaliar_adicoes(estado, livres, dados, length_ramal)
+        avaliados += len(livres)
+        melhor = np.lexsort((erro, -acerto))[0]
+
+        atual = atual.copy()
+        atual[livres[melhor]] = True
+        estado = estado_layout(atual, dados)
+        historico.append({'n_sensores': int(atual.sum()), 'sensor_adicionado': candidatos[livres[melhor]],
+                          'sensores': ' '.join(np.array(candidatos)[atual]),
+                          'acerto': acerto[melhor], 'erro_medio': erro[melhor]})
+
+    return historico, avaliados
+
+
+# --- 4. EXECUCAO PRINCIPAL ---
+
+def main(argv=None, prog=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(prog=prog, description="Otimizador do posicionamento dos medidores inteligentes.")
+    parser.add_argument('--sensores', type=int, default=len(fc.lista_sensores_fc(fc.create_network_graph())),
+                        help="Numero total de sensores a instalar (padrao: o mesmo do conjunto atual).")
+    args = parser.parse_args(argv)
+
+    pasta_resultado = pathlib.Path(script_path).joinpath("result")
+
+    # O dataset deve ser gerado com 'automacao.py --todas-linhas' para que
+    # as correntes de todas as linhas candidatas estejam disponiveis.
+    medidas_df = pd.read_csv(pasta_resultado.joinpath("automacao_falta.csv"), sep=';', decimal=',')
+    estimativas_df = pd.read_csv(pasta_resultado.joinpath("minima_reatancia.csv"), sep=';', decimal=',')
+    if medidas_df.shape[0] != estimativas_df.shape[0]:
+        raise ValueError("automacao_falta.csv e minima_reatancia.csv possuem numeros de registros diferentes; "
+                         "execute novamente minima_reatancia.py.")
+
+    G = fc.create_network_graph()
+    comprimentos = fc.comprimentos_linhas(dss_file)
+    candidatos = [linha for linha in fc.linhas_candidatas_fc(G, comprimentos) if f'{linha}_ia' in medidas_df.columns]
+    lista_sensores = [s for s in fc.lista_sensores_fc(G) if s in candidatos]
+
+    length_ramal = sum(comprimentos[sec_linha] * 304.8 for sec_linha in fc.ramal_principal_func())
+
+    dados = preparar_dados(medidas_df, estimativas_df, candidatos, G)
+
+    # A medicao da subestacao (l1) esta sempre disponivel.
+    inicio = time.perf_counter()
+    historico, avaliados = busca_gulosa(dados, candidatos, args.sensores, ['l1'], length_ramal)
+    tempo = time.perf_counter() - inicio
+
+    atual = np.isin(candidatos, lista_sensores)
+    acerto_atual, erro_atual = avaliar_layouts(atual[None], dados, length_ramal)
+
+    df_resultado = pd.DataFrame(historico)
+    df_resultado.to_csv(pasta_resultado.joinpath("posicionamento_sensores.csv"), sep=';', decimal=',', index=False)
+
+    print(f"{len(candidatos)} linhas candidatas, {dados['estimada'].shape[0]} registros.")
+    print(f"{avaliados} layouts avaliados em {tempo:.2f} s ({avaliados / max(tempo, 1e-9):.0f} layouts/s).")
+    print(f"Conjunto atual ({len(lista_sensores)} sensores): acerto {100 * acerto_atual[0]:.2f}%, "
+          f"|erro| medio {erro_atual[0]:.4f}%")
+    final = historico[-1]
+    print(f"Conjunto otimizado ({final['n_sensores']} sensores): acerto {100 * final['acerto']:.2f}%, "
+          f"|erro| medio {final['erro_medio']:.4f}%")
+    print(f"Sensores: {final['sensores']}")
+
+
+if __name__ == '__main__':
+    main()
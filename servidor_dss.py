@@ -0,0 +1,541 @@
+# --- 1. IMPORTACAO DE BIBLIOTECAS E CONFIGURACOES INICIAIS ---
+import argparse
+import ipaddress
+import os
+import pathlib
+import queue
+import secrets
+import socket
+import threading
+from multiprocessing import AuthenticationError, Pipe, Process
+from multiprocessing.connection import Client, Listener, wait
+
+import funcoes as fc # Importa o módulo local com as funcoes auxiliares
+
+# Define os caminhos de forma robusta, baseando-se na localizacao do script.
+script_path = os.path.dirname(os.path.abspath(__file__))
+dss_file = pathlib.Path(script_path).joinpath("34Bus", "Run_IEEE34Mod1.dss")
+
+# Endereco padrao do servidor local. A chave de autenticacao e gerada a cada execucao e
+# gravada em um arquivo legivel apenas pelo usuario, de onde os clientes a leem.
+ENDERECO_PADRAO = ('localhost', 6000)
+ARQUIVO_CHAVE = pathlib.Path(script_path).joinpath("result", "servidor_dss.chave")
+
+# Motor OpenDSS mantido aquecido em cada processo trabalhador.
+_motor = {}
+
+
+# --- 2. MOTORES OPENDSS AQUECIDOS (PROCESSOS TRABALHADORES) ---
+
+def preparar_circuito():
+    """
+        Recompila o circuito base, deixando o motor pronto para o proximo cenario.
+
+        O circuito e apenas compilado, sem resolver o caso base, exatamente como em automacao.py:
+        resolver o caso base moveria os taps dos reguladores e alteraria o resultado da falta.
+    """
+
+    dss = _motor['dss']
+    dss.text('Clear')
+    dss.text(f'Compile {_motor["dss_file"]}')
+
+
+def inicializar_motor(arquivo_dss):
+    """
+        Cria a instancia do OpenDSS deste processo, compila e resolve o caso base para o
+        pre-processamento das linhas e deixa o circuito pronto para uso.
+    """
+
+    dss = fc.iniciar_dss(arquivo_dss)
+    data = fc.processamento(dss)
+
+    # Comprimento acumulado da subestacao ate o inicio de cada linha (mesmo em todos os circuitos).
+    inicio_linha = {}
+    for circuito in fc.dict_circuitos_func().values():
+        acumulado = 0
+        for linha in circuito:
+            inicio_linha.setdefault(linha, acumulado)
+            acumulado += data[linha]['length']
+
+    _motor.update({'dss': dss,
+                   'dss_file': arquivo_dss,
+                   'data': data,
+                   'lista_sensores': fc.lista_sensores_fc(fc.create_network_graph()),
+                   'inicio_linha': inicio_linha})
+    preparar_circuito()
+
+
+def simular_cenario(cenario):
+    """
+        Simula um cenario de falta no motor aquecido deste processo. O circuito deve estar
+        recem-compilado; a falta aplicada permanece no circuito ate a proxima recompilacao.
+
+        Parametros:
+            cenario (dict): {'linha': str, 'porcentagem': float, 'tipo_falta': str (ex: 'at'),
+                             'r_f': float (ohms)}.
+
+        Retorna:
+            dict: As medicoes (mesmas chaves de measurement_dict_fc) e os metadados da falta. Se a
+                  falta nao for aplicavel às fases da linha, retorna {'cenario': ..., 'aplicavel': False};
+                  em caso de erro, retorna {'cenario': ..., 'erro': mensagem}.
+    """
+
+    dss = _motor['dss']
+    data = _motor['data']
+
+    try:
+        linha = cenario['linha']
+        parametros_falta = fc.aplicar_falta(dss, data, linha, cenario['porcentagem'],
+                                            cenario['tipo_falta'], cenario['r_f'])
+        if parametros_falta is None:
+            return {'cenario': cenario, 'aplicavel': False}
+        fault_bus1, fault_bus2 = parametros_falta
+
+        resultado = fc.coletar_medicoes(dss, data, _motor['lista_sensores'])
+        resultado['linha_faltosa'] = linha
+        resultado['distancia'] = (_motor['inicio_linha'][linha] + cenario['porcentagem'] * data[linha]['length']) * 304.8
+        resultado['tipo'] = str(fault_bus1 + fault_bus2)
+        resultado['r_f'] = cenario['r_f']
+        resultado['cenario'] = cenario
+        resultado['aplicavel'] = True
+        return resultado
+    except Exception as erro:
+        return {'cenario': cenario, 'erro': f'{type(erro).__name__}: {erro}'}
+
+
+def laco_motor(conexao, arquivo_dss):
+    """
+        Laco de um processo trabalhador: recebe cenarios pela conexao, envia cada resultado e SO
+        DEPOIS recompila o circuito base. Assim a recompilacao (Clear + Compile) nao atrasa a
+        resposta do cenario atual; ela ocorre enquanto o servidor usa os outros motores.
+
+        Parametros:
+            conexao (multiprocessing.connection.Connection): Extremidade do Pipe do trabalhador.
+            arquivo_dss (str): Arquivo mestre do modelo.
+    """
+
+    try:
+        inicializar_motor(arquivo_dss)
+    except Exception as erro:
+        conexao.send(f'{type(erro).__name__}: {erro}')
+        return
+    conexao.send('pronto')
+
+    circuito_pronto = True
+    while True:
+        try:
+            cenario = conexao.recv()
+        except EOFError:
+            return
+        if cenario is None:
+            return
+
+        # Se a recompilacao anterior falhou, tenta novamente antes de simular.
+        if not circuito_pronto:
+            try:
+                preparar_circuito()
+                circuito_pronto = True
+            except Exception as erro:
+                conexao.send({'cenario': cenario, 'erro': f'{type(erro).__name__}: {erro}'})
+                continue
+
+        conexao.send(simular_cenario(cenario))
+
+        try:
+            preparar_circuito()
+        except Exception:
+            circuito_pronto = False
+
+
+def criar_motor(arquivo_dss):
+    """
+        Inicia um processo trabalhador, sem aguardar a compilacao do circuito.
+
+        Retorna:
+            tuple: (processo, conexao) do novo motor.
+    """
+
+    local, remoto = Pipe()
+    processo = Process(target=laco_motor, args=(remoto, arquivo_dss), daemon=True)
+    processo.start()
+    remoto.close()
+    return processo, local
+
+
+def aguardar_motor(processo, conexao):
+    """Aguarda a mensagem 'pronto' de um motor recem-criado; gera RuntimeError em caso de falha."""
+
+    try:
+        mensagem = conexao.recv()
+    except EOFError:
+        mensagem = 'processo encerrado durante a inicializacao'
+    if mensagem != 'pronto':
+        conexao.close()
+        processo.join(timeout=30)
+        raise RuntimeError(f"Falha ao iniciar o motor OpenDSS: {mensagem}")
+
+
+def iniciar_motores(processos, arquivo_dss):
+    """
+        Inicia os processos trabalhadores e aguarda que todos estejam com o circuito compilado.
+
+        Retorna:
+            dict: Conjunto de motores: 'processos' {conexao: processo}, 'livres' (fila das
+                  conexoes livres, compartilhada entre os clientes), 'trava' e 'arquivo_dss'.
+    """
+
+    criados = [criar_motor(arquivo_dss) for _ in range(processos)]
+    motores = {'processos': {}, 'livres': queue.Queue(), 'trava': threading.Lock(), 'arquivo_dss': arquivo_dss}
+
+    for processo, conexao in criados:
+        motores['processos'][conexao] = processo
+        try:
+            aguardar_motor(processo, conexao)
+        except RuntimeError:
+            encerrar_motores(motores)
+            raise
+        motores['livres'].put(conexao)
+
+    return motores
+
+
+def substituir_motor(motores, conexao):
+    """
+        Descarta um motor encerrado inesperadamente e tenta iniciar outro em seu lugar. Se a
+        substituicao falhar, o conjunto fica com um motor a menos.
+    """
+
+    with motores['trava']:
+        processo = motores['processos'].pop(conexao, None)
+    conexao.close()
+    if processo is not None:
+        processo.join(timeout=5)
+        if processo.is_alive():
+            processo.terminate()
+
+    try:
+        processo, conexao = criar_motor(motores['arquivo_dss'])
+        aguardar_motor(processo, conexao)
+    except (RuntimeError, OSError) as erro:
+        print(f"Motor OpenDSS descartado sem substituto: {erro}")
+        return
+
+    with motores['trava']:
+        motores['processos'][conexao] = processo
+    motores['livres'].put(conexao)
+
+
+def obter_motor(motores, bloquear):
+    """
+        Retira um motor da fila de livres.
+
+        Parametros:
+            motores (dict): Conjunto retornado por iniciar_motores.
+            bloquear (bool): Aguarda um motor livre, se nenhum estiver disponivel no momento.
+
+        Retorna:
+            Connection: A conexao do motor, ou None se nao houver motor livre (sem bloquear) ou
+                        se nenhum motor estiver em funcionamento.
+    """
+
+    while True:
+        with motores['trava']:
+            if not motores['processos']:
+                return None
+        try:
+            # A espera e limitada para que a falta de motores seja percebida.
+            return motores['livres'].get(block=bloquear, timeout=1 if bloquear else None)
+        except queue.Empty:
+            if not bloquear:
+                return None
+
+
+def encerrar_motores(motores):
+    """Solicita o encerramento dos processos trabalhadores e aguarda o seu termino."""
+
+    with motores['trava']:
+        processos = list(motores['processos'].items())
+        motores['processos'].clear()
+
+    for conexao, _ in processos:
+        try:
+            conexao.send(None)
+        except OSError:
+            pass
+        conexao.close()
+
+    for _, processo in processos:
+        processo.join(timeout=30)
+        if processo.is_alive():
+            processo.terminate()
+
+
+def distribuir(cenarios, motores):
+    """
+        Distribui um lote de cenarios entre os motores livres e gera os resultados na ordem dos
+        cenarios, a medida que ficam disponiveis.
+
+        Um motor volta para a fila assim que envia o seu resultado, mesmo que ainda esteja
+        recompilando: como a fila e FIFO, os motores ociosos ha mais tempo sao usados primeiro.
+        Um motor encerrado inesperadamente e substituido; se nao restar nenhum motor, os
+        cenarios ainda nao enviados recebem um erro.
+
+        Parametros:
+            cenarios (list): Lista de cenarios no formato aceito por simular_cenario.
+            motores (dict): Conjunto retornado por iniciar_motores.
+
+        Retorna:
+            generator: Os resultados, na mesma ordem dos cenarios.
+    """
+
+    cenarios = list(cenarios)
+    ocupados = {}  # conexao do motor -> indice do cenario
+    concluidos = {}
+    proximo_envio = 0
+    proximo_resultado = 0
+
+    try:
+        while proximo_resultado < len(cenarios):
+            # Envia cenarios enquanto houver motores livres; so bloqueia se nenhum estiver ocupado.
+            while proximo_envio < len(cenarios):
+                conexao = obter_motor(motores, bloquear=not ocupados)
+                if conexao is None:
+                    break
+                try:
+                    conexao.send(cenarios[proximo_envio])
+                except OSError:
+                    substituir_motor(motores, conexao)
+                    continue
+                ocupados[conexao] = proximo_envio
+                proximo_envio += 1
+
+            if not ocupados:
+                for indice in range(proximo_envio, len(cenarios)):
+                    concluidos[indice] = {'cenario': cenarios[indice], 'erro': 'Nenhum motor OpenDSS em funcionamento.'}
+                proximo_envio = len(cenarios)
+
+            for conexao in (wait(list(ocupados)) if ocupados else []):
+                indice = ocupados.pop(conexao)
+                try:
+                    concluidos[indice] = conexao.recv()
+                    motores['livres'].put(conexao)
+                except (EOFError, OSError):
+                    concluidos[indice] = {'cenario': cenarios[indice],
+                                          'erro': 'O motor OpenDSS foi encerrado inesperadamente.'}
+                    substituir_motor(motores, conexao)
+
+            while proximo_resultado in concluidos:
+                yield concluidos.pop(proximo_resultado)
+                proximo_resultado += 1
+    finally:
+        # Se o cliente desconectar no meio do lote, recolhe os motores ainda ocupados.
+        for conexao in ocupados:
+            try:
+                conexao.recv()
+                motores['livres'].put(conexao)
+            except (EOFError, OSError):
+                substituir_motor(motores, conexao)
+
+
+# --- 3. SERVIDOR LOCAL ---
+
+def verificar_loopback(host):
+    """
+        Garante que o servidor so escute em enderecos locais: as mensagens sao objetos
+        serializados com pickle, e quem conhece a chave pode executar codigo no servidor.
+    """
+
+    try:
+        enderecos = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror as erro:
+        raise ValueError(f"Endereco invalido: {host}") from erro
+
+    if not all(ipaddress.ip_address(endereco.split('%')[0]).is_loopback for endereco in enderecos):
+        raise ValueError(f"O servidor aceita apenas enderecos locais (loopback); '{host}' nao e permitido.")
+
+
+def gerar_chave(arquivo_chave):
+    """
+        Gera uma chave de autenticacao aleatoria e a grava em um arquivo legivel apenas pelo
+        usuario (permissao 0600; no Windows, vale a protecao da pasta do usuario).
+
+        Retorna:
+            bytes: A chave gerada.
+    """
+
+    chave = secrets.token_bytes(32)
+    arquivo_chave.parent.mkdir(exist_ok=True)
+    arquivo_chave.unlink(missing_ok=True)
+
+    # O arquivo e criado ja com a permissao restrita, sem janela em que outro usuario possa le-lo.
+    descritor = os.open(arquivo_chave, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descritor, 'w') as f:
+        f.write(chave.hex())
+    return chave
+
+
+def ler_chave(arquivo_chave):
+    """Le a chave de autenticacao gravada pelo servidor em execucao."""
+
+    try:
+        with open(arquivo_chave) as f:
+            return bytes.fromhex(f.read().strip())
+    except FileNotFoundError as erro:
+        raise FileNotFoundError(f"Chave do servidor nao encontrada em {arquivo_chave}; "
+                                "o servidor esta em execucao?") from erro
+
+
+def validar_cenario(cenario):
+    """
+        Verifica o formato de um cenario recebido de um cliente.
+
+        Retorna:
+            str: A descricao do problema, ou None se o cenario for valido.
+    """
+
+    if not isinstance(cenario, dict):
+        return f"O cenario deve ser um dicionario (recebido: {type(cenario).__name__})."
+    for chave, tipo in [('linha', str), ('porcentagem', (int, float)), ('tipo_falta', str), ('r_f', (int, float))]:
+        if not isinstance(cenario.get(chave), tipo) or isinstance(cenario.get(chave), bool):
+            return f"O cenario deve conter '{chave}' do tipo {getattr(tipo, '__name__', 'numerico')}."
+    if not 0 < cenario['porcentagem'] < 1:
+        return "'porcentagem' deve estar entre 0 e 1."
+    return None
+
+
+def atender(conexao, motores, encerrar, endereco, chave):
+    """
+        Atende um cliente: cada mensagem {'comando': 'simular', 'cenarios': [...]} e distribuida
+        entre os motores e os resultados sao enviados de volta na ordem, um a um, seguidos de None.
+        A mensagem {'comando': 'encerrar'} finaliza o servidor.
+    """
+
+    with conexao:
+        while True:
+            try:
+                mensagem = conexao.recv()
+            except (EOFError, OSError):
+                return
+
+            comando = mensagem.get('comando') if isinstance(mensagem, dict) else None
+
+            if comando == 'simular':
+                cenarios = mensagem.get('cenarios')
+                if not isinstance(cenarios, (list, tuple)):
+                    conexao.send({'erro': "A mensagem 'simular' deve conter a lista 'cenarios'."})
+                    conexao.send(None)
+                    continue
+
+                # Cenarios invalidos recebem o erro diretamente, sem ocupar um motor.
+                erros = [validar_cenario(cenario) for cenario in cenarios]
+                resultados = distribuir([c for c, erro in zip(cenarios, erros) if erro is None], motores)
+                try:
+                    for cenario, erro in zip(cenarios, erros):
+                        conexao.send(next(resultados) if erro is None else {'cenario': cenario, 'erro': erro})
+                    conexao.send(None)
+                except OSError:
+                    return
+                finally:
+                    resultados.close()
+            elif comando == 'encerrar':
+                encerrar.set()
+                # Uma conexao vazia desbloqueia o accept() do laco principal, que pode fecha-la
+                # antes do fim da autenticacao: erros dessa conexao sao irrelevantes.
+                try:
+                    Client(endereco, authkey=chave).close()
+                except (OSError, EOFError, AuthenticationError):
+                    pass
+                return
+            else:
+                conexao.send({'erro': f"Mensagem invalida: esperado {{'comando': 'simular' ou 'encerrar'}}, "
+                                      f"recebido {type(mensagem).__name__} com comando {comando!r}."})
+
+
+def servir(endereco=ENDERECO_PADRAO, arquivo_chave=ARQUIVO_CHAVE, processos=None):
+    """
+        Inicia os motores OpenDSS aquecidos e atende clientes ate receber 'encerrar'.
+
+        Parametros:
+            endereco (tuple): (host, porta) do servidor; o host deve ser um endereco local.
+            arquivo_chave (pathlib.Path): Arquivo onde a chave de autenticacao desta execucao e gravada.
+            processos (int): Numero de motores OpenDSS (padrao: numero de nucleos).
+    """
+
+    verificar_loopback(endereco[0])
+
+    motores = iniciar_motores(processos or os.cpu_count(), str(dss_file))
+
+    encerrar = threading.Event()
+    chave = gerar_chave(arquivo_chave)
+
+    try:
+        with Listener(endereco, authkey=chave) as listener:
+            print(f"Servidor OpenDSS pronto em {endereco[0]}:{endereco[1]} (chave em {arquivo_chave}).")
+            while not encerrar.is_set():
+                try:
+                    conexao = listener.accept()
+                except (OSError, EOFError, AuthenticationError):
+                    # Cliente com chave incorreta ou que desconectou durante a autenticacao.
+                    continue
+                if encerrar.is_set():
+                    conexao.close()
+                    break
+                threading.Thread(target=atender, args=(conexao, motores, encerrar, endereco, chave),
+                                 daemon=True).start()
+    finally:
+        arquivo_chave.unlink(missing_ok=True)
+        encerrar_motores(motores)
+
+    print("Servidor OpenDSS encerrado.")
+
+
+# --- 4. CLIENTE ---
+
+def simular_remoto(cenarios, endereco=ENDERECO_PADRAO, arquivo_chave=ARQUIVO_CHAVE):
+    """
+        Envia um lote de cenarios ao servidor e retorna os resultados à medida que chegam.
+
+        Parametros:
+            cenarios (list): Lista de cenarios no formato aceito por simular_cenario.
+            endereco (tuple): (host, porta) do servidor local.
+            arquivo_chave (pathlib.Path): Arquivo com a chave gravada pelo servidor.
+
+        Retorna:
+            generator: Os resultados, na mesma ordem dos cenarios.
+    """
+
+    with Client(endereco, authkey=ler_chave(arquivo_chave)) as conexao:
+        conexao.send({'comando': 'simular', 'cenarios': list(cenarios)})
+        while True:
+            resultado = conexao.recv()
+            if resultado is None:
+                return
+            yield resultado
+
+
+def encerrar_servidor(endereco=ENDERECO_PADRAO, arquivo_chave=ARQUIVO_CHAVE):
+    """Solicita o encerramento do servidor."""
+
+    with Client(endereco, authkey=ler_chave(arquivo_chave)) as conexao:
+        conexao.send({'comando': 'encerrar'})
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Servidor local com motores OpenDSS aquecidos.")
+    parser.add_argument('--host', default=ENDERECO_PADRAO[0], help="Endereco local (loopback) do servidor.")
+    parser.add_argument('--porta', type=int, default=ENDERECO_PADRAO[1])
+    parser.add_argument('--arquivo-chave', type=pathlib.Path, default=ARQUIVO_CHAVE,
+                        help="Arquivo onde o servidor grava a chave de autenticacao e de onde os clientes a leem.")
+    parser.add_argument('--processos', type=int, default=os.cpu_count(), help="Numero de motores OpenDSS.")
+    parser.add_argument('--encerrar', action='store_true', help="Encerra um servidor em execucao.")
+    args = parser.parse_args(argv)
+
+    endereco = (args.host, args.porta)
+    if args.encerrar:
+        encerrar_servidor(endereco, args.arquivo_chave)
+    else:
+        servir(endereco, args.arquivo_chave, args.processos)
+
+
+if __name__ == '__main__':
+    main()